@@ -0,0 +1,202 @@
+"""
+Graph_Walk in a Nutshell
+
+The ladybug of LadyBug.py walks on a clock: a cycle of 12 markings. But the same question
+("which place is visited last, and how long until everything is visited?") makes sense on any graph:
+paths, grids, 2-D tori (a grid whose edges wrap around), complete graphs, and with lazy or biased walkers.
+
+The graph is given in CSR form (compressed sparse rows): the neighbours of node v are indices[indptr[v]:indptr[v + 1]],
+optionally with weights (the chance of taking each edge is proportional to its weight).
+We let many walkers walk at the same time, one step per loop for all of them. Every walker keeps the nodes it visited as a bitset
+(one bit per node in an array of 64-bit words) and a counter of unvisited nodes. When a walker has visited every node it retires,
+and we record its last newly visited node and its cover time (number of steps).
+
+clock(12) is the wall clock of LadyBug.py (node 0 is marking 12), so cover_walk(clock(12), ...) gives the same last-marking distribution.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+DEFAULT_WALKERS = 2**14
+
+class Graph(NamedTuple):
+    indptr: np.ndarray  # Neighbours of node v are indices[indptr[v]:indptr[v + 1]]
+    indices: np.ndarray
+    weights: np.ndarray | None = None  # Relative chance of taking each edge (None: all edges equally likely)
+
+    @property
+    def n_nodes(self) -> int:
+        return self.indptr.size - 1
+
+
+class CoverResult(NamedTuple):
+    last_visited: np.ndarray  # How many walkers visited each node last
+    cover_times: np.ndarray  # Histogram: cover_times[t] = number of walkers that needed exactly t steps
+
+
+def from_edges(n_nodes: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray | None = None) -> Graph:
+    # Builds the CSR form from a list of directed edges source -> target.
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+    return Graph(indptr, targets[order], None if weights is None else np.asarray(weights, dtype=float)[order])
+
+
+# ---- Presets ----
+
+def cycle(n_nodes: int, p_clockwise: float = 0.5, laziness: float = 0.0) -> Graph:
+    # Nodes 0 .. n_nodes - 1 on a circle. With laziness > 0 the walker stays where it is with that chance.
+    nodes = np.arange(n_nodes)
+    sources = np.concatenate((nodes, nodes, nodes))
+    targets = np.concatenate(((nodes + 1) % n_nodes, (nodes - 1) % n_nodes, nodes))
+    weights = np.concatenate((np.full(n_nodes, (1 - laziness) * p_clockwise), np.full(n_nodes, (1 - laziness) * (1 - p_clockwise)), np.full(n_nodes, laziness)))
+    keep = weights > 0
+    graph = from_edges(n_nodes, sources[keep], targets[keep], weights[keep])
+    return graph if p_clockwise != 0.5 or laziness else graph._replace(weights=None)
+
+
+def clock(n_markings: int = 12) -> Graph:
+    # The wall clock of LadyBug.py: node 0 is marking 12, node k is marking k, the ladybug starts at node 0.
+    return cycle(n_markings)
+
+
+def path(n_nodes: int) -> Graph:
+    nodes = np.arange(n_nodes - 1)
+    return from_edges(n_nodes, np.concatenate((nodes, nodes + 1)), np.concatenate((nodes + 1, nodes)))
+
+
+def grid(width: int, height: int, wrap: bool = False) -> Graph:
+    # width x height grid, node (x, y) is y * width + x. With wrap=True it is a 2-D torus.
+    x, y = np.meshgrid(np.arange(width), np.arange(height))
+    x, y = x.ravel(), y.ravel()
+    sources, targets = [], []
+    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        nx, ny = x + dx, y + dy
+        if wrap:
+            nx, ny = nx % width, ny % height
+            inside = np.ones(x.size, dtype=bool)
+        else:
+            inside = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+        sources.append((y * width + x)[inside])
+        targets.append((ny * width + nx)[inside])
+    return from_edges(width * height, np.concatenate(sources), np.concatenate(targets))
+
+
+def torus(width: int, height: int) -> Graph:
+    return grid(width, height, wrap=True)
+
+
+def complete(n_nodes: int) -> Graph:
+    sources, targets = np.nonzero(~np.eye(n_nodes, dtype=bool))
+    return from_edges(n_nodes, sources, targets)
+
+
+def lazy(graph: Graph, laziness: float = 0.5) -> Graph:
+    # The same graph, but the walker stays where it is with chance `laziness` in every step.
+    n_nodes = graph.n_nodes
+    degree = np.diff(graph.indptr)
+    sources = np.repeat(np.arange(n_nodes), degree)
+    weights = graph.weights if graph.weights is not None else np.ones(graph.indices.size)
+    out_weight = np.bincount(sources, weights=weights, minlength=n_nodes)
+    moving = weights / out_weight[sources] * (1 - laziness)
+    nodes = np.arange(n_nodes)
+    return from_edges(n_nodes, np.concatenate((sources, nodes)), np.concatenate((graph.indices, nodes)), np.concatenate((moving, np.full(n_nodes, laziness))))
+
+
+# ---- The walk ----
+
+def _edge_picker(graph: Graph):
+    # Returns a function (current nodes, uniform random numbers) -> next nodes
+    indptr, indices = graph.indptr, graph.indices
+    if np.any(np.diff(indptr) == 0):
+        raise ValueError("every node needs at least one outgoing edge")
+    if graph.weights is None:
+        degree = np.diff(indptr)
+        def pick(current: np.ndarray, uniform: np.ndarray) -> np.ndarray:
+            return indices[indptr[current] + (uniform * degree[current]).astype(np.int64)]
+        return pick
+
+    # Weighted: cumulative weights of every row, shifted by the row number, so one sorted array covers all rows:
+    # the edges of row v cover (v, v + 1], and searching v + u finds the edge taken with chance proportional to its weight.
+    degree = np.diff(indptr)
+    rows = np.repeat(np.arange(graph.n_nodes), degree)
+    row_total = np.bincount(rows, weights=graph.weights, minlength=graph.n_nodes)
+    within_row = np.cumsum(graph.weights) - np.repeat(np.cumsum(row_total) - row_total, degree)
+    boundaries = rows + within_row / row_total[rows]
+    boundaries[indptr[1:] - 1] = np.arange(1, graph.n_nodes + 1)  # Exact row ends, so rounding never leaks into the next row
+    def pick(current: np.ndarray, uniform: np.ndarray) -> np.ndarray:
+        edge = np.searchsorted(boundaries, current + uniform, side="right")
+        return indices[np.minimum(edge, indptr[current + 1] - 1)]
+    return pick
+
+
+def cover_walk(graph: Graph, n_walkers: int = DEFAULT_WALKERS, start: int = 0, rng: np.random.Generator | None = None, max_steps: int | None = None) -> CoverResult:
+    # Lets n_walkers walkers walk from `start` until each of them has visited every node.
+    if n_walkers < 1:
+        raise ValueError("n_walkers must be at least 1")
+    if rng is None:
+        rng = np.random.default_rng()
+    n_nodes = graph.n_nodes
+    pick = _edge_picker(graph)
+    n_words = (n_nodes + 63) // 64
+
+    last_visited = np.zeros(n_nodes, dtype=np.int64)
+    cover_times = []
+    if n_nodes == 1:
+        last_visited[start] = n_walkers
+        return CoverResult(last_visited, np.array([n_walkers], dtype=np.int64))
+
+    # State of the walkers that are still walking
+    walker = np.arange(n_walkers)
+    current = np.full(n_walkers, start, dtype=np.int64)
+    visited = np.zeros((n_walkers, n_words), dtype=np.uint64)
+    visited[:, start // 64] = np.uint64(1) << np.uint64(start % 64)
+    unvisited = np.full(n_walkers, n_nodes - 1, dtype=np.int64)
+    steps = 0
+
+    while walker.size:
+        steps += 1
+        if max_steps is not None and steps > max_steps:
+            raise RuntimeError(f"{walker.size} walkers did not cover the graph within {max_steps} steps")
+        current = pick(current, rng.random(walker.size))
+
+        # Is the new node already in the bitset of the walker?
+        rows = np.arange(walker.size)
+        word = current >> 6
+        bit = np.left_shift(np.uint64(1), (current & 63).astype(np.uint64))
+        new = (visited[rows, word] & bit) == 0
+        if not new.any():
+            continue
+        visited[rows[new], word[new]] |= bit[new]
+        unvisited -= new
+
+        # Walkers that just visited their last node retire
+        done = unvisited == 0
+        if done.any():
+            np.add.at(last_visited, current[done], 1)
+            cover_times.append((steps, int(np.count_nonzero(done))))
+            keep = ~done
+            walker, current, visited, unvisited = walker[keep], current[keep], visited[keep], unvisited[keep]
+
+    histogram = np.zeros(cover_times[-1][0] + 1, dtype=np.int64)
+    for step, count in cover_times:
+        histogram[step] = count
+    return CoverResult(last_visited, histogram)
+
+
+def mean_cover_time(result: CoverResult) -> float:
+    return float(np.arange(result.cover_times.size) @ result.cover_times / result.cover_times.sum())
+
+
+if __name__ == "__main__":
+    result = cover_walk(clock(12), 100_000)
+    distritbutions = result.last_visited / result.last_visited.sum()
+    for marking in range(1, 12):
+        print(f" {marking}'clock: {distritbutions[marking]:.2%}")
+    print(f"Mean cover time on the clock: {mean_cover_time(result):.2f} steps")
+    for name, graph in (("path of 100", path(100)), ("10x10 grid", grid(10, 10)), ("100x100 torus", torus(100, 100)), ("complete graph of 1000", complete(1000))):
+        result = cover_walk(graph, 256)
+        print(f"Mean cover time on the {name}: {mean_cover_time(result):.0f} steps")
@@ -0,0 +1,195 @@
+"""
+Instrumentation in a Nutshell
+
+Where does the time go in the pure Python games? How many steps does a ladybug round take, how many rallies does a squash match last
+(the win-by-two tail), and how often does the 1000-door host have to build his list of remaining goat doors?
+
+Every one of these games draws its random numbers through the module-level `random` of its script. So we don't touch the games at all:
+while instrumentation is on, the `random` of the game module is replaced by a counting stand-in, which counts (and times) every call.
+Playing one round at a time then gives us per round
+1. the number of random draws (for the ladybug that is the number of steps, for squash the number of rallies),
+2. the calls of each random function (random.choice is only called when the 1000-door host has to pick from the remaining goat doors),
+3. the time spent drawing random numbers and the time spent in the game logic.
+Optionally cProfile profiles every k-th round, and tracemalloc records where memory is allocated.
+When instrumentation is off, the game modules are exactly the original ones, so there is no overhead at all.
+
+    python Instrumentation.py ladybug --rounds 10000 --profile-every 100 --memory --output ladybug_metrics.json
+"""
+
+import argparse
+import cProfile
+import importlib
+import io
+import json
+import pstats
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+# Game -> (module, function, arguments, what one random draw is in this game)
+GAMES = {
+    "monty_hall": ("Monty_Hall_Problem", "monty_hall_game", (True,), "draws"),
+    "monty_hall_52": ("Monty_Hall_Problem_FrenchCards", "monty_hall_game", (True,), "draws"),
+    "monty_hall_1000": ("Monty_Hall_Problem_1000Doors", "monty_hall_game", (True,), "draws"),
+    "squash": ("Squash_Serve", "match", (), "rallies"),
+    "ladybug": ("LadyBug", "one_full_round_the_clock", (), "steps"),
+    "ladybug_fast": ("LadyBug", "one_full_round_the_clock_fast", (), "random words"),
+}
+
+class CountingRandom:
+    # Stands in for the random module of a game module: every call is passed on to `random`, counted and timed.
+
+    def __init__(self):
+        self.calls = Counter()
+        self.draws = 0
+        self.seconds = 0.0
+
+    def __getattr__(self, name):
+        function = getattr(random, name)
+        if not callable(function):
+            return function
+        calls = self.calls
+        perf_counter = time.perf_counter
+
+        def counted(*args, **kwargs):
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            self.seconds += perf_counter() - start
+            calls[name] += 1
+            # A shuffle of n items draws n - 1 random numbers
+            self.draws += max(len(args[0]) - 1, 0) if name == "shuffle" else 1
+            return result
+
+        setattr(self, name, counted)  # Later lookups find the wrapper directly, without __getattr__
+        return counted
+
+
+def _histogram(values) -> dict:
+    # {value: how often} sorted by value, with string keys for JSON
+    return {str(value): count for value, count in sorted(Counter(values).items())}
+
+
+def _summary(values: list) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    def percentile(q: float):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"mean": sum(ordered) / len(ordered), "min": ordered[0], "p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99), "max": ordered[-1]}
+
+
+class Instrumented:
+    # While active, module.random is a CountingRandom:
+    #     with Instrumented(LadyBug) as instrumented:
+    #         metrics = instrumented.play(LadyBug.one_full_round_the_clock, 10_000)
+
+    def __init__(self, module, profile_every: int = 0, trace_memory: bool = False):
+        self.module = module
+        self.profile_every = profile_every
+        self.trace_memory = trace_memory
+        self.counting = CountingRandom()
+        self.profiler = cProfile.Profile() if profile_every else None
+
+    def __enter__(self) -> "Instrumented":
+        self._original = self.module.random
+        self.module.random = self.counting
+        if self.trace_memory:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.module.random = self._original
+        if self.trace_memory:
+            self._memory = self._memory_report()
+            tracemalloc.stop()
+
+    def play(self, function, n_rounds: int, *args, draw_name: str = "draws") -> dict:
+        # Plays n_rounds rounds one at a time and collects the metrics of every round.
+        counting = self.counting
+        draws_per_round, rng_seconds, logic_seconds = [], [], []
+        calls_per_round = {}
+        outcomes = Counter()
+        perf_counter = time.perf_counter
+        total_start = perf_counter()
+        for round_number in range(n_rounds):
+            draws_before, rng_before, calls_before = counting.draws, counting.seconds, counting.calls.copy()
+            profiled = self.profiler is not None and round_number % self.profile_every == 0
+            if profiled:
+                self.profiler.enable()
+            start = perf_counter()
+            outcome = function(*args)
+            elapsed = perf_counter() - start
+            if profiled:
+                self.profiler.disable()
+            outcomes[outcome] += 1
+            draws_per_round.append(counting.draws - draws_before)
+            rng_seconds.append(counting.seconds - rng_before)
+            logic_seconds.append(elapsed - rng_seconds[-1])
+            for name, count in (counting.calls - calls_before).items():
+                calls_per_round.setdefault(name, Counter())[count] += 1
+
+        seconds = perf_counter() - total_start
+        return {
+            "rounds": n_rounds,
+            "seconds": seconds,
+            "outcomes": {str(outcome): count for outcome, count in sorted(outcomes.items(), key=lambda item: str(item[0]))},
+            draw_name: {"summary": _summary(draws_per_round), "histogram": _histogram(draws_per_round)},
+            # How many rounds called each random function how often (rounds that never called it are counted as 0 calls)
+            "calls_per_round": {name: {str(calls): rounds for calls, rounds in sorted((Counter({0: n_rounds - counts.total()}) + counts).items())}
+                                for name, counts in sorted(calls_per_round.items())},
+            "time_per_phase": {"random draws": sum(rng_seconds), "game logic": sum(logic_seconds), "bookkeeping": seconds - sum(rng_seconds) - sum(logic_seconds)},
+            "seconds_per_round": _summary([rng + logic for rng, logic in zip(rng_seconds, logic_seconds)]),
+        }
+
+    def profile_report(self, top: int = 15) -> str:
+        if self.profiler is None:
+            return ""
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(top)
+        return output.getvalue()
+
+    def _memory_report(self, top: int = 10) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+        return {"current_bytes": current, "peak_bytes": peak,
+                "top_allocations": [{"where": str(statistic.traceback), "bytes": statistic.size, "blocks": statistic.count} for statistic in statistics]}
+
+    def memory_report(self) -> dict:
+        return getattr(self, "_memory", {})
+
+
+def run(game: str, n_rounds: int, profile_every: int = 0, trace_memory: bool = False, output: str | None = None, seed: int | None = None) -> dict:
+    # Plays n_rounds instrumented rounds of `game` and returns the metrics report (also written to `output` as JSON, if given).
+    if game not in GAMES:
+        raise ValueError(f"unknown game {game}, known games are {tuple(GAMES)}")
+    module_name, function_name, args, draw_name = GAMES[game]
+    module = importlib.import_module(module_name)
+    random.seed(seed)
+    with Instrumented(module, profile_every, trace_memory) as instrumented:
+        metrics = instrumented.play(getattr(module, function_name), n_rounds, *args, draw_name=draw_name)
+    report = {"game": game, "function": f"{module_name}.{function_name}", "seed": seed, **metrics}
+    if profile_every:
+        report["profile"] = {"every": profile_every, "stats": instrumented.profile_report()}
+    if trace_memory:
+        report["memory"] = instrumented.memory_report()
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=1)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play instrumented rounds of a pure Python game and report per-round metrics.")
+    parser.add_argument("game", choices=tuple(GAMES))
+    parser.add_argument("--rounds", type=int, default=10_000)
+    parser.add_argument("--profile-every", type=int, default=0, help="profile every k-th round with cProfile (0: off)")
+    parser.add_argument("--memory", action="store_true", help="record allocations with tracemalloc")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="JSON report file (default: <game>_metrics.json)")
+    args = parser.parse_args()
+    report = run(args.game, args.rounds, args.profile_every, args.memory, args.output or f"{args.game}_metrics.json", args.seed)
+    draw_name = GAMES[args.game][3]
+    print(f"{args.game}: {report['rounds']} rounds in {report['seconds']:.2f} s, {draw_name} per round {report[draw_name]['summary']}")
+    print(f"Time per phase: {report['time_per_phase']}")
+    print(f"Report saved as {args.output or f'{args.game}_metrics.json'}")
@@ -23,8 +23,11 @@ Let's see how much chance a mark has to be the last one visited!
 """
 
 import random
+from functools import lru_cache
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+FIELD_BITS = 16  # Random bits per biased coin flip
 
 def one_full_round_the_clock() -> int:
     #Clock markings from 1 to 12.
@@ -63,24 +66,59 @@ def one_full_round_the_clock() -> int:
                 current_marking = 10
                 visited_markings[10] = 1
     return current_marking            
-            
-def distributions_over_time(num_rounds: int) -> np.ndarray:
+
+@lru_cache(maxsize=None)
+def _coin_threshold(p: float) -> tuple[int, int, float]:
+    # (bits per flip, threshold, remainder): a flip of `bits` random bits r is heads if r < threshold.
+    # A fair coin needs a single bit. For any other p, r has FIELD_BITS bits and threshold = floor(p * 2**FIELD_BITS);
+    # when r hits the threshold exactly, one extra random.random() < remainder decides, so heads has exactly chance p
+    # (with remainder 0, e.g. for the fair coin, there is nothing to decide and no extra draw).
+    if p == 0.5:
+        return 1, 1, 0.0
+    scaled = p * (1 << FIELD_BITS)
+    threshold = int(scaled)
+    return FIELD_BITS, threshold, scaled - threshold
+
+def one_full_round_the_clock_fast(p_clockwise: float = 0.5, n_markings: int = 12) -> int:
+    # The same round as one_full_round_the_clock (marking 0 is marking 12), without a NumPy array per step:
+    # the coin flips come 64 random bits at a time, and the visited markings are the bits of one integer, with a counter of the unvisited ones.
+    bits, threshold, remainder = _coin_threshold(p_clockwise)
+    mask = (1 << bits) - 1
+    flips_per_word = 64 // bits
+    getrandbits = random.getrandbits
+    last = n_markings - 1
+
+    visited = 1  # Bit k is set once marking k was visited, we start at marking 0
+    unvisited = last
+    current_marking = 0
+    word = 0
+    flips_left = 0
+    while unvisited:
+        if not flips_left:
+            word = getrandbits(64)
+            flips_left = flips_per_word
+        flip = word & mask
+        word >>= bits
+        flips_left -= 1
+        if flip < threshold or (remainder and flip == threshold and random.random() < remainder):  # Clockwise
+            current_marking = current_marking + 1 if current_marking != last else 0
+        else:
+            current_marking = current_marking - 1 if current_marking else last
+        if not visited >> current_marking & 1:
+            visited |= 1 << current_marking
+            unvisited -= 1
+    return current_marking
+
+def distributions_over_time(num_rounds: int, fast: bool = False) -> np.ndarray:
     winNumbers = np.zeros(12, dtype=int)
     for t in range(num_rounds):
-        last_marking = one_full_round_the_clock()
+        last_marking = one_full_round_the_clock_fast() if fast else one_full_round_the_clock()
         winNumbers[last_marking] += 1
     return winNumbers / num_rounds
 
-if __name__ == "__main__":
-    num_simulations = 10_000
-    distritbutions = distributions_over_time(num_simulations)
-    print(f" 1'clock: {distritbutions[1]:.2%} \n 2'clock: {distritbutions[2]:.2%} \n 3'clock: {distritbutions[3]:.2%} \n 4'clock: {distritbutions[4]:.2%} \n 5'clock: {distritbutions[5]:.2%} \n 6'clock: {distritbutions[6]:.2%} \n 7'clock: {distritbutions[7]:.2%} \n 8'clock: {distritbutions[8]:.2%} \n 9'clock: {distritbutions[9]:.2%} \n 10'clock: {distritbutions[10]:.2%} \n 11'clock: {distritbutions[11]:.2%}")
-
-#Let's also create a diagram to visualize the distribution of the last markings.
-#For this, you will have to install numpy and matplotlib if you haven't already.
-
-    for i, value in enumerate(distritbutions, start=1):
-        print(f"Marking {i}: {value:.2%}")
+def plot_distribution(distritbutions: np.ndarray, filename: str = "Ladybug_Distribution.png") -> None:
+    #For this, you will have to install matplotlib if you haven't already.
+    import matplotlib.pyplot as plt  # Only loaded when we actually make a plot
 
     # ---- Diagram ----
     markings = np.arange(1, 13)
@@ -93,5 +131,16 @@ if __name__ == "__main__":
     plt.xticks(markings)
     plt.ylim(0, max(distritbutions) * 1.1)
 
-    plt.savefig("Ladybug_Distribution.png", dpi=300)
-    print("Diagram saved as Ladybug_Distribution.png")
\ No newline at end of file
+    plt.savefig(filename, dpi=300)
+    print(f"Diagram saved as {filename}")
+
+if __name__ == "__main__":
+    num_simulations = 10_000
+    distritbutions = distributions_over_time(num_simulations)
+    print(f" 1'clock: {distritbutions[1]:.2%} \n 2'clock: {distritbutions[2]:.2%} \n 3'clock: {distritbutions[3]:.2%} \n 4'clock: {distritbutions[4]:.2%} \n 5'clock: {distritbutions[5]:.2%} \n 6'clock: {distritbutions[6]:.2%} \n 7'clock: {distritbutions[7]:.2%} \n 8'clock: {distritbutions[8]:.2%} \n 9'clock: {distritbutions[9]:.2%} \n 10'clock: {distritbutions[10]:.2%} \n 11'clock: {distritbutions[11]:.2%}")
+
+    for i, value in enumerate(distritbutions, start=1):
+        print(f"Marking {i}: {value:.2%}")
+
+    #Let's also create a diagram to visualize the distribution of the last markings.
+    plot_distribution(distritbutions)
@@ -0,0 +1,98 @@
+"""
+LadyBug_Exact in a Nutshell
+
+Instead of estimating the chance of each marking being the last one from simulations (with percent-level noise),
+let's compute it exactly!
+
+Like in LadyBug_Jump.py we only look at the moments when a new marking gets colored. At those moments the whole state of the game is
+(how many markings the colored arc covers, how many of them are clockwise of the start, at which end of the arc the ladybug sits).
+Going from one such state to the next is a gambler's ruin problem, so we know both the chance of each next state
+and the expected number of steps it takes. Pushing the probabilities through all arc lengths gives us
+1. the exact probability of each marking being the last one, and
+2. the exact expected number of steps until every marking is colored (the cover time),
+for any number of markings and any chance of moving clockwise.
+
+For the fair ladybug we can check the answers by hand: every marking other than the start is last with probability 1 / (n_markings - 1),
+and the cover time is n_markings * (n_markings - 1) / 2 steps.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from LadyBug_Jump import clockwise_extension_probabilities, gamblers_ruin_probability
+
+
+def _expected_exit_steps(start: np.ndarray, width: np.ndarray, p_up: float) -> np.ndarray:
+    # Expected number of steps of a walk starting at `start` until it reaches 0 or `width`.
+    start = start.astype(float)
+    width = width.astype(float)
+    if p_up == 0.5:
+        return start * (width - start)
+    drift = 1 - 2 * p_up
+    return start / drift - width / drift * gamblers_ruin_probability(start, width, p_up)
+
+
+@lru_cache(maxsize=256)
+def _transition_table(n_markings: int, p_clockwise: float) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # For every arc length 1 .. n_markings - 1 and both ends of the arc:
+    # the chance to color the clockwise marking next, and the expected number of steps until the next marking gets colored.
+    from_ccw_end, from_cw_end = clockwise_extension_probabilities(n_markings + 1, p_clockwise)
+    arc = np.arange(1, n_markings)
+    steps_from_ccw_end = _expected_exit_steps(np.ones_like(arc), arc + 1, p_clockwise)
+    steps_from_cw_end = _expected_exit_steps(arc, arc + 1, p_clockwise)
+    for table in (from_ccw_end, from_cw_end, steps_from_ccw_end, steps_from_cw_end):
+        table.setflags(write=False)
+    return from_ccw_end, from_cw_end, steps_from_ccw_end, steps_from_cw_end
+
+
+@lru_cache(maxsize=1024)
+def _solve(n_markings: int, p_clockwise: float) -> tuple[np.ndarray, float]:
+    from_ccw_end, from_cw_end, steps_from_ccw_end, steps_from_cw_end = _transition_table(n_markings, p_clockwise)
+
+    # Probability of each state at the moment the arc has `arc_length` markings:
+    # index = number of colored markings clockwise of the start, one array per end of the arc.
+    at_ccw_end = np.array([1.0])
+    at_cw_end = np.array([0.0])
+    cover_time = 0.0
+    for arc_length in range(1, n_markings):
+        phase = arc_length - 1
+        cover_time += at_ccw_end.sum() * steps_from_ccw_end[phase] + at_cw_end.sum() * steps_from_cw_end[phase]
+        if arc_length == n_markings - 1:
+            break
+        go_clockwise = at_ccw_end * from_ccw_end[phase] + at_cw_end * from_cw_end[phase]
+        go_counter_clockwise = at_ccw_end * (1 - from_ccw_end[phase]) + at_cw_end * (1 - from_cw_end[phase])
+        at_cw_end = np.concatenate(([0.0], go_clockwise))
+        at_ccw_end = np.concatenate((go_counter_clockwise, [0.0]))
+
+    # With n_markings - 1 markings colored, the last marking is the one right after the clockwise end of the arc.
+    last = np.zeros(n_markings)
+    clockwise_arc = np.arange(at_ccw_end.size)
+    last[(clockwise_arc + 1) % n_markings] = at_ccw_end + at_cw_end
+    last.setflags(write=False)
+    return last, float(cover_time)
+
+
+def last_marking_distribution(n_markings: int = 12, p_clockwise: float = 0.5) -> np.ndarray:
+    # Exact probability of each marking (0 = start) being the last one colored.
+    if n_markings < 2:
+        raise ValueError("n_markings must be at least 2")
+    if not 0 < p_clockwise < 1:
+        raise ValueError("p_clockwise must be strictly between 0 and 1")
+    return _solve(n_markings, float(p_clockwise))[0].copy()
+
+
+def expected_cover_time(n_markings: int = 12, p_clockwise: float = 0.5) -> float:
+    # Exact expected number of steps until every marking is colored.
+    if n_markings < 2:
+        raise ValueError("n_markings must be at least 2")
+    if not 0 < p_clockwise < 1:
+        raise ValueError("p_clockwise must be strictly between 0 and 1")
+    return _solve(n_markings, float(p_clockwise))[1]
+
+
+if __name__ == "__main__":
+    distritbutions = last_marking_distribution(12)
+    for marking in range(1, 12):
+        print(f" {marking}'clock: {distritbutions[marking]:.4%}")
+    print(f"Expected number of steps to color every marking: {expected_cover_time(12):.2f}")
@@ -0,0 +1,133 @@
+"""
+LadyBug_Jump in a Nutshell
+
+The same ladybug as in LadyBug.py, but instead of following every single step of the ladybug we jump from one newly colored marking to the next.
+
+The colored markings always form one connected arc around the start marking, and the ladybug always sits at one end of it
+(it has just colored that marking). From there it will either color the next marking at the same end of the arc
+or walk all the way through the arc and color the next marking at the other end.
+This is the classic gambler's ruin problem: with an arc of L markings, a fair ladybug reaches the other end first with probability 1 / (L + 1).
+
+So one full round is just n_markings - 1 coin flips (one per newly colored marking) instead of ~n_markings^2 / 2 steps,
+and we can play all rounds at once with NumPy.
+
+Markings are numbered 0 .. n_markings - 1 clockwise, 0 is the start marking (12 on the wall clock),
+so the result of distributions_over_time has the same layout as the one in LadyBug.py.
+"""
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 2**16
+
+def gamblers_ruin_probability(start, width: int, p_up: float):
+    # Probability that a walk starting at `start` (0 < start < width), moving up with probability p_up, reaches `width` before 0.
+    start = np.asarray(start, dtype=float)
+    if p_up == 0.5:
+        return start / width
+    log_ratio = np.log((1 - p_up) / p_up)
+    if log_ratio < 0:
+        return np.expm1(start * log_ratio) / np.expm1(width * log_ratio)
+    # Rewritten for ratios above 1, so that ratio**width never overflows
+    return np.exp((start - width) * log_ratio) * np.expm1(-start * log_ratio) / np.expm1(-width * log_ratio)
+
+
+def clockwise_extension_probabilities(n_markings: int, p_clockwise: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+    # For every arc length L = 1 .. n_markings - 2: the chance that the next colored marking is the clockwise one,
+    # if the ladybug sits at the counter-clockwise end / at the clockwise end of the arc.
+    arc = np.arange(1, n_markings - 1)
+    from_counter_clockwise_end = gamblers_ruin_probability(np.ones_like(arc), arc + 1, p_clockwise)
+    from_clockwise_end = gamblers_ruin_probability(arc, arc + 1, p_clockwise)
+    return np.atleast_1d(from_counter_clockwise_end), np.atleast_1d(from_clockwise_end)
+
+
+def _walk_until_exit(start: np.ndarray, width: int, p_clockwise: float, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    # Follow the ladybug step by step inside the arc (in blocks of steps for all rounds at once),
+    # until it leaves at 0 or at `width`. Returns the number of steps and whether it left clockwise.
+    steps = np.zeros(start.size, dtype=np.int64)
+    clockwise = np.zeros(start.size, dtype=bool)
+    position = start.astype(np.int64)
+    active = np.arange(start.size)
+    while active.size:
+        block = int(min(max(16, 2 * width), max(16, 2**22 // active.size)))
+        moves = np.where(rng.random((active.size, block)) < p_clockwise, 1, -1)
+        path = position[active, None] + np.cumsum(moves, axis=1)
+        exited = (path <= 0) | (path >= width)
+        finished = exited.any(axis=1)
+        first = exited.argmax(axis=1)
+
+        done = active[finished]
+        steps[done] += first[finished] + 1
+        clockwise[done] = path[finished, first[finished]] >= width
+
+        running = active[~finished]
+        steps[running] += block
+        position[running] = path[~finished, -1]
+        active = running
+    return steps, clockwise
+
+
+def _uniforms(n: int, rng: np.random.Generator, antithetic: bool) -> np.ndarray:
+    # With antithetic=True, round i + n // 2 uses 1 - u where round i uses u (see Variance_Reduction.py).
+    if not antithetic:
+        return rng.random(n)
+    half = rng.random(n // 2)
+    return np.concatenate((half, 1 - half, rng.random(n % 2)))
+
+
+def jump_round_the_clock(n_rounds: int, n_markings: int = 12, p_clockwise: float = 0.5, rng: np.random.Generator | None = None, count_steps: bool = False, antithetic: bool = False):
+    # Plays n_rounds full rounds at once. Returns the last colored marking of each round
+    # (and the number of steps each round took, if count_steps is True).
+    if n_markings < 2:
+        raise ValueError("n_markings must be at least 2")
+    if not 0 < p_clockwise < 1:
+        raise ValueError("p_clockwise must be strictly between 0 and 1")
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Number of colored markings clockwise / counter-clockwise of the start marking
+    clockwise_arc = np.zeros(n_rounds, dtype=np.int64)
+    at_clockwise_end = np.zeros(n_rounds, dtype=bool)
+    steps = np.zeros(n_rounds, dtype=np.int64)
+
+    if not count_steps:
+        # The markings before the last one: one coin flip per newly colored marking.
+        # Once n_markings - 1 markings are colored, the last one is the single marking left.
+        from_ccw_end, from_cw_end = clockwise_extension_probabilities(n_markings, p_clockwise)
+        for phase in range(n_markings - 2):
+            p = np.where(at_clockwise_end, from_cw_end[phase], from_ccw_end[phase])
+            at_clockwise_end = _uniforms(n_rounds, rng, antithetic) < p
+            clockwise_arc += at_clockwise_end
+        return (clockwise_arc + 1) % n_markings
+
+    # Counting steps: we also have to follow the walk inside the arc, but still jump from end to end of the arc.
+    if antithetic:
+        raise ValueError("antithetic rounds are not supported when counting steps")
+    for arc_length in range(1, n_markings):
+        # Position inside the arc, measured from the counter-clockwise unvisited marking
+        start = np.where(at_clockwise_end, arc_length, 1)
+        phase_steps, at_clockwise_end = _walk_until_exit(start, arc_length + 1, p_clockwise, rng)
+        steps += phase_steps
+        if arc_length < n_markings - 1:
+            clockwise_arc += at_clockwise_end
+    return (clockwise_arc + 1) % n_markings, steps
+
+
+def last_marking_counts(n_rounds: int, n_markings: int = 12, p_clockwise: float = 0.5, rng: np.random.Generator | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    if rng is None:
+        rng = np.random.default_rng()
+    counts = np.zeros(n_markings, dtype=np.int64)
+    for start in range(0, n_rounds, chunk_size):
+        size = min(chunk_size, n_rounds - start)
+        counts += np.bincount(jump_round_the_clock(size, n_markings, p_clockwise, rng), minlength=n_markings)
+    return counts
+
+
+def distributions_over_time(num_rounds: int, n_markings: int = 12, p_clockwise: float = 0.5, rng: np.random.Generator | None = None) -> np.ndarray:
+    return last_marking_counts(num_rounds, n_markings, p_clockwise, rng) / num_rounds
+
+
+if __name__ == "__main__":
+    num_simulations = 1_000_000
+    distritbutions = distributions_over_time(num_simulations)
+    for marking in range(1, 12):
+        print(f" {marking}'clock: {distritbutions[marking]:.2%}")
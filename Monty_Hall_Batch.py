@@ -0,0 +1,102 @@
+"""
+Monty_Hall_Batch in a Nutshell
+
+The same game as in Monty_Hall_Problem.py, Monty_Hall_Problem_1000Doors.py and Monty_Hall_Problem_FrenchCards.py,
+but instead of playing one game per Python call, we play millions of games at once with NumPy.
+
+The trick is that we never build the doors themselves:
+1. The car position and the player's pick are just two random integers between 0 and n_doors - 1 per game.
+2. If the player picked the car, the host leaves a random goat door closed (any door other than the pick).
+3. If the player picked a goat, the car is among the n_doors - 1 - n_revealed doors the host leaves closed,
+   so a switching player lands on it with probability 1 / (n_doors - 1 - n_revealed).
+
+With n_revealed = n_doors - 2 (the host opens every door but one, like in all three scripts) this is exactly the game we play there,
+so the outcome distribution is the same as the one of the per-game monty_hall_game functions.
+"""
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 2**20
+
+def _revealed_doors(n_doors: int, n_revealed: int | None) -> int:
+    # By default the host opens every door except the player's one and one other door.
+    if n_revealed is None:
+        n_revealed = n_doors - 2
+    if n_doors < 2:
+        raise ValueError("n_doors must be at least 2")
+    if not 0 <= n_revealed <= n_doors - 2:
+        raise ValueError("n_revealed must be between 0 and n_doors - 2 (the host only opens goat doors the player did not pick)")
+    return n_revealed
+
+
+def play_batch(n_games: int, n_doors: int = 3, n_revealed: int | None = None, switch: bool = True, rng: np.random.Generator | None = None) -> np.ndarray:
+    n_revealed = _revealed_doors(n_doors, n_revealed)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Where is the car, and which door does the player choose?
+    car = rng.integers(0, n_doors, size=n_games)
+    choice = rng.integers(0, n_doors, size=n_games)
+
+    # The host's choice doesn't change anything if the player sticks, so we don't even have to sample it.
+    if not switch:
+        return choice == car
+
+    # If the player decides to switch, she picks the other door
+    return _other_door(car, choice, n_doors, n_revealed, rng) == car
+
+
+def _other_door(car: np.ndarray, choice: np.ndarray, n_doors: int, n_revealed: int, rng: np.random.Generator) -> np.ndarray:
+    # The closed door a switching player moves to, after the host opened n_revealed goat doors.
+    n_games = car.size
+    # Doors that stay closed besides the player's own door
+    closed_others = n_doors - 1 - n_revealed
+
+    # Player picked the car -> every other closed door is a goat, the player switches to a random one of them
+    goat_after_car = (choice + rng.integers(1, n_doors, size=n_games)) % n_doors
+
+    # Player picked a goat -> the car is one of the closed doors, the player finds it with probability 1 / closed_others
+    if closed_others == 1:
+        return np.where(choice == car, goat_after_car, car)
+    finds_car = rng.integers(0, closed_others, size=n_games) == 0
+    # A random goat door that is neither the player's door nor the car (skip both indices)
+    low = np.minimum(choice, car)
+    high = np.maximum(choice, car)
+    goat = rng.integers(0, max(n_doors - 2, 1), size=n_games)
+    goat += goat >= low
+    goat += goat >= high
+    return np.where(choice == car, goat_after_car, np.where(finds_car, car, goat))
+
+
+def play_both(n_games: int, n_doors: int = 3, n_revealed: int | None = None, rng: np.random.Generator | None = None) -> tuple[np.ndarray, np.ndarray]:
+    # The same games played by a switching and a sticking player (common random numbers): (switch wins, stick wins).
+    n_revealed = _revealed_doors(n_doors, n_revealed)
+    if rng is None:
+        rng = np.random.default_rng()
+    car = rng.integers(0, n_doors, size=n_games)
+    choice = rng.integers(0, n_doors, size=n_games)
+    return _other_door(car, choice, n_doors, n_revealed, rng) == car, choice == car
+
+
+def count_wins(n_games: int, n_doors: int = 3, n_revealed: int | None = None, switch: bool = True, rng: np.random.Generator | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    # Play the games in chunks, so that 10^8 games don't need gigabytes of memory.
+    if rng is None:
+        rng = np.random.default_rng()
+    wins = 0
+    for start in range(0, n_games, chunk_size):
+        size = min(chunk_size, n_games - start)
+        wins += int(np.count_nonzero(play_batch(size, n_doors, n_revealed, switch, rng)))
+    return wins
+
+
+def win_ratio(n_games: int, n_doors: int = 3, n_revealed: int | None = None, switch: bool = True, rng: np.random.Generator | None = None) -> float:
+    return count_wins(n_games, n_doors, n_revealed, switch, rng) / n_games
+
+
+if __name__ == "__main__":
+    num_simulations = 10_000_000
+    rng = np.random.default_rng()
+    for n_doors in (3, 52, 1000):
+        switch_win_rate = win_ratio(num_simulations, n_doors, switch=True, rng=rng)
+        stick_win_rate = win_ratio(num_simulations, n_doors, switch=False, rng=rng)
+        print(f"{n_doors} doors -> Switching win rate: {switch_win_rate:.4%}, Sticking win rate: {stick_win_rate:.4%}")
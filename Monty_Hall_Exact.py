@@ -0,0 +1,124 @@
+"""
+Monty_Hall_Exact in a Nutshell
+
+Instead of estimating 1/3, 1/52 and 1/1000 from simulations, let's compute the win chances exactly, as fractions,
+and for more hosts than the one of Monty_Hall_Problem.py:
+1. the knowing host (he only opens goat doors, like in all three scripts) and the ignorant host (he opens random doors,
+   and if he reveals a prize the game is spoiled; we report the win chances of the games that were not spoiled, and the spoil chance),
+2. several reveal rounds (the host opens some doors, the player may switch, the host opens more doors, ...),
+3. several prize doors, and
+4. a biased host, who prefers to keep some doors closed when he is free to choose.
+
+We never enumerate the doors. Doors the player does not hold and that are still closed all look the same to the player,
+so the whole game is described by how many of them are closed and whether the player holds a prize
+(as long as no prize was revealed, the other closed doors hide all remaining prizes).
+Pushing the two chances "player holds a prize" / "player holds a goat" through the rounds takes a handful of fraction operations
+per round, so a thousand doors are solved as quickly as three.
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+from math import comb
+from typing import Sequence
+
+HOSTS = ("knowing", "ignorant")
+
+def _no_prize_revealed(closed_others: int, goats_among_others: int, opened: int, host: str) -> Fraction:
+    # Chance that the host opens `opened` of the closed other doors without revealing a prize.
+    if host == "ignorant":
+        return Fraction(comb(goats_among_others, opened), comb(closed_others, opened))
+    if goats_among_others < opened:
+        raise ValueError(f"the knowing host cannot open {opened} goat doors, only {goats_among_others} are left")
+    return Fraction(1)
+
+
+@lru_cache(maxsize=1024)
+def _solve(n_doors: int, n_prizes: int, reveals: tuple[int, ...], policy: tuple[bool, ...], host: str) -> tuple[Fraction, Fraction]:
+    # Returns (chance that the player wins and the game was not spoiled, chance that the game was not spoiled).
+    holds_prize = Fraction(n_prizes, n_doors)
+    holds_goat = 1 - holds_prize
+    closed_others = n_doors - 1
+    for opened, switch in zip(reveals, policy):
+        if holds_prize:
+            holds_prize *= _no_prize_revealed(closed_others, closed_others - (n_prizes - 1), opened, host)
+        if holds_goat:
+            holds_goat *= _no_prize_revealed(closed_others, closed_others - n_prizes, opened, host)
+        closed_others -= opened
+        if switch:
+            if not closed_others:
+                raise ValueError("the player cannot switch, there is no other closed door left")
+            # The player moves to a random other closed door, which hides a prize with chance (prizes among them) / closed_others
+            from_prize_to_prize = Fraction(n_prizes - 1, closed_others)
+            from_goat_to_prize = Fraction(n_prizes, closed_others)
+            holds_prize, holds_goat = (holds_prize * from_prize_to_prize + holds_goat * from_goat_to_prize,
+                                       holds_prize * (1 - from_prize_to_prize) + holds_goat * (1 - from_goat_to_prize))
+    return holds_prize, holds_prize + holds_goat
+
+
+def _arguments(n_doors: int, n_prizes: int, reveals: Sequence[int] | None, policy: bool | Sequence[bool], host: str) -> tuple:
+    # Checks the game and brings it into the (hashable) form of _solve.
+    if n_doors < 2:
+        raise ValueError("n_doors must be at least 2")
+    if not 1 <= n_prizes < n_doors:
+        raise ValueError("n_prizes must be between 1 and n_doors - 1")
+    if host not in HOSTS:
+        raise ValueError(f"host must be one of {HOSTS}")
+    if reveals is None:
+        # One round, in which the host opens every door he can while leaving a prize door closed for the player to switch to
+        reveals = (max(n_doors - 1 - n_prizes, 0),)
+    reveals = tuple(int(opened) for opened in reveals)
+    if any(opened < 0 for opened in reveals) or sum(reveals) > n_doors - 1:
+        raise ValueError("the host can only open doors the player does not hold, each of them once")
+    if isinstance(policy, bool):
+        # True: switch once, after the last round; False: always stick
+        policy = (False,) * (len(reveals) - 1) + (policy,) if reveals else ()
+    policy = tuple(bool(switch) for switch in policy)
+    if len(policy) != len(reveals):
+        raise ValueError("policy needs one switch decision per reveal round")
+    return n_doors, n_prizes, reveals, policy, host
+
+
+def win_probability(n_doors: int = 3, n_prizes: int = 1, reveals: Sequence[int] | None = None, policy: bool | Sequence[bool] = True, host: str = "knowing") -> Fraction:
+    # Exact chance to win (for the ignorant host: given that no prize was revealed).
+    # reveals[i] doors are opened in round i; after round i the player switches to a random other closed door if policy[i].
+    win, not_spoiled = _solve(*_arguments(n_doors, n_prizes, reveals, policy, host))
+    if not not_spoiled:
+        raise ValueError("the host reveals a prize in every game")
+    return win / not_spoiled
+
+
+def spoil_probability(n_doors: int = 3, n_prizes: int = 1, reveals: Sequence[int] | None = None, policy: bool | Sequence[bool] = True, host: str = "ignorant") -> Fraction:
+    # Exact chance that the (ignorant) host reveals a prize at some point, so the game is spoiled.
+    return 1 - _solve(*_arguments(n_doors, n_prizes, reveals, policy, host))[1]
+
+
+def switch_and_stick(n_doors: int = 3, n_prizes: int = 1, reveals: Sequence[int] | None = None, host: str = "knowing") -> tuple[Fraction, Fraction]:
+    # (win chance when switching after the last round, win chance when always sticking)
+    return win_probability(n_doors, n_prizes, reveals, True, host), win_probability(n_doors, n_prizes, reveals, False, host)
+
+
+def biased_host(preferences: Sequence, kept_door: int) -> tuple[Fraction, Fraction]:
+    # One car, the knowing host opens every door but the player's one and one other door.
+    # preferences[i] is his weight for keeping other door i closed when he is free to choose (the player holds the car).
+    # Returns (switch, stick) win chances, given that the host kept door `kept_door` closed.
+    weights = [Fraction(weight) for weight in preferences]
+    if len(weights) < 1 or any(weight < 0 for weight in weights) or not sum(weights):
+        raise ValueError("preferences need one non-negative weight per other door, and not all of them can be 0")
+    if not 0 <= kept_door < len(weights):
+        raise ValueError(f"kept_door must be between 0 and {len(weights) - 1} (one of the other doors)")
+    # Player holds the car (chance 1 / n_doors): the host keeps kept_door closed with chance w / W.
+    # Car behind kept_door (chance 1 / n_doors): the host has to keep it closed. Both have the factor 1 / n_doors, which cancels.
+    kept_by_choice = weights[kept_door] / sum(weights)
+    stick = kept_by_choice / (kept_by_choice + 1)
+    return 1 - stick, stick
+
+
+if __name__ == "__main__":
+    for n_doors in (3, 52, 1000):
+        switch, stick = switch_and_stick(n_doors)
+        print(f"{n_doors} doors -> Switching win rate: {switch} ({float(switch):.4%}), Sticking win rate: {stick} ({float(stick):.4%})")
+    switch, stick = switch_and_stick(3, host="ignorant")
+    print(f"Ignorant host, 3 doors -> Switching: {switch}, Sticking: {stick}, spoiled games: {spoil_probability(3)}")
+    print(f"1000 doors, host opens 499 + 499 doors, switching after both rounds: {win_probability(1000, reveals=(499, 499), policy=(True, True))}")
+    print(f"4 doors, 2 cars, host opens 1 goat door -> Switching: {win_probability(4, 2, (1,))}, Sticking: {win_probability(4, 2, (1,), False)}")
+    print(f"3 doors, host always keeps the first other door closed when he can, and he did -> (switch, stick): {biased_host([1, 0], 0)}")
@@ -22,7 +22,6 @@ The result should confirm one of 2 theories:
 
 import random
 import numpy as np
-import matplotlib.pyplot as plt
 
 def monty_hall_game(switch: bool) -> bool:
     # defining what's behind the doors (0 -> car, 1 -> goat)
@@ -57,30 +56,38 @@ def win_ratios_over_time(num_rounds: int, switch: bool) -> np.ndarray:
 
     return ratios
 
+def plot_stay_ratios(ratios: np.ndarray, filename: str = "monty_hall_stay.png", plot_limit: int = 10000) -> None:
+    #For this, you will have to install matplotlib if you haven't already.
+    import matplotlib.pyplot as plt  # Only loaded when we actually make a plot
+    from Plotting import downsample, min_max_envelope  # At most a few thousand points are drawn, whatever plot_limit is
+
+    plot_limit = min(plot_limit, len(ratios))
+    # Plot how the ratio changes by increasing $n$  
+
+    x = np.arange(1, plot_limit + 1)
+    y = ratios[:plot_limit]
+    envelope_x, lowest, highest = min_max_envelope(x, y)
+    x, y = downsample(x, y)
+
+    plt.title("Win ratio over n if we stay (no switch)")
+    plt.xlabel("n = number of rounds played")
+    plt.ylabel("Cumulative win percentage")
+    plt.axhline(y=1/3, linestyle="--", alpha=0.6, label="Theoretical 1/3")
+    plt.fill_between(envelope_x, lowest, highest, alpha=0.3)
+    plt.plot(x, y)
+    plt.xlim(1, plot_limit)
+    plt.ylim(0.1, 0.6)
+    plt.legend()
+    plt.savefig(filename, dpi=200)
+    #plt.show()
+
 if __name__ == "__main__":
     num_simulations = 10_000
     switch_win_rate = win_ratios_over_time(num_simulations, True)[-1]
-    stick_win_rate = win_ratios_over_time(num_simulations, False)[-1]
+    stick_ratios = win_ratios_over_time(num_simulations, False)
+    stick_win_rate = stick_ratios[-1]
     print(f"Switching win rate: {switch_win_rate:.2%}")
     print(f"Sticking win rate: {stick_win_rate:.2%}")
 
-# More than looking at the number, let's make some plots to visualize the results!
-#For this, you will have to install numpy and matplotlib if you haven't already.
-
-ratios = win_ratios_over_time(num_simulations, False)
-plot_limit = 10000
-# Plot how the ratio changes by increasing $n$  
-
-x = np.arange(1, plot_limit + 1)
-y = ratios[:plot_limit]
-
-plt.title("Win ratio over n if we stay (no switch)")
-plt.xlabel("n = number of rounds played")
-plt.ylabel("Cumulative win percentage")
-plt.axhline(y=1/3, linestyle="--", alpha=0.6, label="Theoretical 1/3")
-plt.plot(x, y)
-plt.xlim(1, plot_limit)
-plt.ylim(0.1, 0.6)
-plt.legend()
-plt.savefig("monty_hall_stay.png", dpi=200)
-#plt.show()
+    # More than looking at the number, let's make some plots to visualize the results!
+    plot_stay_ratios(stick_ratios)
@@ -0,0 +1,235 @@
+"""
+Outcome_Log in a Nutshell
+
+A study of 10^10 Monty Hall games or 10^9 squash matches runs for hours. If it crashes after 3 hours, we don't want to lose 3 hours,
+and afterwards we want to look at the results in new ways (convergence curves, bootstrap errors) without playing everything again.
+
+So a run writes the outcome of every single round to a file on disk, packed as tightly as possible:
+1. 1 bit per round for Monty Hall (did switching win?) and squash (did the first server win?), and
+2. 4 bits per round for the ladybug (the last marking, so up to 16 markings).
+10^10 games are 1.25 GB. The file is memory-mapped, so neither writing nor reading it needs the whole file in memory.
+
+Next to the outcomes, meta.json stores the game, its parameters, how many rounds are written, and the state of the random number generator
+after the last written round. It is rewritten atomically (temporary file + rename) after every few chunks, always after the outcomes
+of those chunks are flushed to disk. An interrupted run resumes from the last checkpoint with the stored random state,
+so it produces exactly the same outcomes as a run that was never interrupted.
+
+The analyses read the packed bytes straight from the memory-mapped file, one block at a time, without unpacking the whole log.
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+import LadyBug_Jump
+import Monty_Hall_Batch
+import Squash_Batch
+
+BITS_PER_ROUND = {"monty_hall": 1, "squash": 1, "ladybug": 4}
+DEFAULT_CHUNK_SIZE = 2**20
+_ONES_PER_BYTE = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+
+def _play(game: str, n_rounds: int, params: dict, rng: np.random.Generator) -> np.ndarray:
+    # Outcome of every round: switching won / first server won (bool), or the last marking (0 .. n_markings - 1).
+    if game == "monty_hall":
+        return Monty_Hall_Batch.play_batch(n_rounds, rng=rng, **params)
+    if game == "squash":
+        return Squash_Batch.play_batch(n_rounds, rng=rng, **params).player1_wins
+    if game == "ladybug":
+        return LadyBug_Jump.jump_round_the_clock(n_rounds, rng=rng, **params)
+    raise ValueError(f"unknown game {game}, known games are {tuple(BITS_PER_ROUND)}")
+
+
+def pack(outcomes: np.ndarray, bits: int) -> np.ndarray:
+    # 8 outcomes per byte (bits=1, first round in the lowest bit) or 2 per byte (bits=4, first round in the low nibble)
+    if bits == 1:
+        return np.packbits(np.asarray(outcomes, dtype=bool), bitorder="little")
+    nibbles = np.asarray(outcomes, dtype=np.uint8)
+    if nibbles.size % 2:
+        nibbles = np.append(nibbles, np.uint8(0))
+    return nibbles[0::2] | (nibbles[1::2] << 4)
+
+
+def unpack(packed: np.ndarray, bits: int, n_rounds: int) -> np.ndarray:
+    if bits == 1:
+        return np.unpackbits(packed, count=n_rounds, bitorder="little").astype(bool)
+    nibbles = np.empty(2 * packed.size, dtype=np.uint8)
+    nibbles[0::2] = packed & 0x0F
+    nibbles[1::2] = packed >> 4
+    return nibbles[:n_rounds]
+
+
+def _write_json_atomically(path: Path, content: dict) -> None:
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "w") as file:
+        json.dump(content, file, indent=1)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+class OutcomeLog:
+    # A run (finished or not) stored in `directory`: outcomes.bin (the packed outcomes) and meta.json.
+
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = Path(directory)
+        with open(self.directory / "meta.json") as file:
+            self.meta = json.load(file)
+        self.bits = BITS_PER_ROUND[self.meta["game"]]
+
+    @classmethod
+    def create(cls, directory: str | os.PathLike, game: str, rounds: int, seed: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE, **params) -> "OutcomeLog":
+        # A new, empty log for `rounds` rounds of `game` (params as in the batch engine of the game).
+        if game not in BITS_PER_ROUND:
+            raise ValueError(f"unknown game {game}, known games are {tuple(BITS_PER_ROUND)}")
+        if game == "ladybug" and params.get("n_markings", 12) > 16:
+            raise ValueError("the log stores the last marking in 4 bits, so at most 16 markings")
+        if chunk_size % 8:
+            raise ValueError("chunk_size must be a multiple of 8, so every chunk starts at a byte boundary")
+        directory = Path(directory)
+        if (directory / "meta.json").exists():
+            raise FileExistsError(f"{directory} already holds a log, open it with OutcomeLog({str(directory)!r})")
+        directory.mkdir(parents=True, exist_ok=True)
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        with open(directory / "outcomes.bin", "wb") as file:
+            file.truncate(math.ceil(rounds * BITS_PER_ROUND[game] / 8))  # Sparse file, the disk fills up as the run goes on
+        rng = np.random.default_rng(seed)
+        meta = {"game": game, "params": params, "rounds": rounds, "seed": seed, "chunk_size": chunk_size,
+                "rounds_written": 0, "rng_state": rng.bit_generator.state}
+        _write_json_atomically(directory / "meta.json", meta)
+        return cls(directory)
+
+    @property
+    def rounds_written(self) -> int:
+        return self.meta["rounds_written"]
+
+    @property
+    def complete(self) -> bool:
+        return self.rounds_written >= self.meta["rounds"]
+
+    def _rng(self) -> np.random.Generator:
+        # The random number generator, exactly as it was after the last checkpointed round
+        state = self.meta["rng_state"]
+        bit_generator = getattr(np.random, state["bit_generator"])()
+        bit_generator.state = state
+        return np.random.Generator(bit_generator)
+
+    def run(self, max_chunks: int | None = None, checkpoint_every: int = 4) -> "OutcomeLog":
+        # Plays the missing rounds chunk by chunk (at most max_chunks chunks), checkpointing after every `checkpoint_every` chunks.
+        rng = self._rng()
+        rounds, chunk_size = self.meta["rounds"], self.meta["chunk_size"]
+        written = self.rounds_written
+        log = np.memmap(self.directory / "outcomes.bin", dtype=np.uint8, mode="r+")
+        try:
+            chunks = 0
+            while written < rounds and (max_chunks is None or chunks < max_chunks):
+                size = min(chunk_size, rounds - written)
+                packed = pack(_play(self.meta["game"], size, self.meta["params"], rng), self.bits)
+                start = written * self.bits // 8
+                log[start:start + packed.size] = packed
+                written += size
+                chunks += 1
+                if chunks % checkpoint_every == 0 or written == rounds:
+                    self._checkpoint(log, written, rng)
+            self._checkpoint(log, written, rng)
+        finally:
+            del log
+        return self
+
+    def _checkpoint(self, log: np.memmap, written: int, rng: np.random.Generator) -> None:
+        # Outcomes first, then the metadata: if we crash in between, the resumed run rewrites the same bytes.
+        log.flush()
+        self.meta["rounds_written"] = written
+        self.meta["rng_state"] = rng.bit_generator.state
+        _write_json_atomically(self.directory / "meta.json", self.meta)
+
+    # ---- Reading the log ----
+
+    def packed(self) -> np.ndarray:
+        # Read-only view of the packed bytes of every written round (memory-mapped, nothing is read until it is used)
+        size = math.ceil(self.rounds_written * self.bits / 8)
+        if not size:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(self.directory / "outcomes.bin", dtype=np.uint8, mode="r", shape=(size,))
+
+    def outcomes(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        # Unpacked outcomes of rounds start .. stop - 1 (start must be a multiple of 8 / of 2)
+        stop = self.rounds_written if stop is None else min(stop, self.rounds_written)
+        rounds_per_byte = 8 // self.bits
+        if start % rounds_per_byte:
+            raise ValueError(f"start must be a multiple of {rounds_per_byte}")
+        if stop <= start:
+            return unpack(np.zeros(0, dtype=np.uint8), self.bits, 0)
+        first, last = start // rounds_per_byte, math.ceil(stop / rounds_per_byte)
+        return unpack(np.asarray(self.packed()[first:last]), self.bits, stop - start)
+
+    def block_counts(self, block_rounds: int, bytes_per_read: int = 2**24) -> np.ndarray:
+        # Wins (or counts of each marking, shape (blocks, 16)) in consecutive blocks of block_rounds rounds.
+        # The last block may be shorter. Read in slices of the memory-mapped file, never unpacked as a whole.
+        rounds_per_byte = 8 // self.bits
+        if block_rounds % rounds_per_byte:
+            raise ValueError(f"block_rounds must be a multiple of {rounds_per_byte}")
+        packed = self.packed()
+        block_bytes = block_rounds // rounds_per_byte
+        n_blocks = math.ceil(packed.size / block_bytes)
+        counts = np.zeros((n_blocks, 16) if self.bits == 4 else n_blocks, dtype=np.int64)
+        step = max(block_bytes, bytes_per_read // block_bytes * block_bytes)  # Whole blocks per read
+        for start in range(0, packed.size, step):
+            piece = packed[start:start + step]
+            first_block = start // block_bytes
+            if self.bits == 1:
+                block_sums = np.add.reduceat(_ONES_PER_BYTE[piece], np.arange(0, piece.size, block_bytes))
+                counts[first_block:first_block + block_sums.size] = block_sums
+            else:
+                block = first_block + np.arange(piece.size) // block_bytes
+                low = np.bincount(block * 16 + (piece & 0x0F), minlength=16 * n_blocks)
+                high = np.bincount(block * 16 + (piece >> 4), minlength=16 * n_blocks)
+                counts += (low + high).reshape(n_blocks, 16)
+        if self.bits == 4 and self.rounds_written % 2:
+            counts[-1, 0] -= 1  # The unused high nibble of the last byte
+        return counts
+
+    def block_sizes(self, block_rounds: int) -> np.ndarray:
+        # Rounds in every block of block_counts
+        n_blocks = math.ceil(self.rounds_written / block_rounds)
+        sizes = np.full(n_blocks, block_rounds, dtype=np.int64)
+        if n_blocks:
+            sizes[-1] = self.rounds_written - (n_blocks - 1) * block_rounds
+        return sizes
+
+    def convergence(self, block_rounds: int = 2**16) -> tuple[np.ndarray, np.ndarray]:
+        # Rounds played and cumulative win ratio (or marking frequencies) after every block, like the plots of the scripts
+        counts = np.cumsum(self.block_counts(block_rounds), axis=0)
+        rounds = np.cumsum(self.block_sizes(block_rounds))
+        return rounds, counts / (rounds[:, None] if counts.ndim == 2 else rounds)
+
+    def block_bootstrap(self, block_rounds: int = 2**16, n_resamples: int = 1_000, rng: np.random.Generator | None = None) -> np.ndarray:
+        # Win ratio (or marking frequencies) of n_resamples bootstrap samples, each made of randomly drawn blocks (with replacement).
+        # The spread of these values is the statistical error of the whole log; using blocks keeps the count cheap for huge logs.
+        if rng is None:
+            rng = np.random.default_rng()
+        counts = self.block_counts(block_rounds)
+        sizes = self.block_sizes(block_rounds)
+        drawn = rng.integers(0, sizes.size, size=(n_resamples, sizes.size))
+        resampled_rounds = sizes[drawn].sum(axis=1)
+        if counts.ndim == 1:
+            return counts[drawn].sum(axis=1) / resampled_rounds
+        return np.stack([counts[draws].sum(axis=0) for draws in drawn]) / resampled_rounds[:, None]
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = OutcomeLog.create(Path(directory) / "monty_hall", "monty_hall", 10**8, seed=2024, n_doors=3)
+        start = time.perf_counter()
+        log.run(max_chunks=40)  # Let's pretend we crash after 40 chunks ...
+        log = OutcomeLog(Path(directory) / "monty_hall").run()  # ... and resume
+        print(f"{log.rounds_written} games in {time.perf_counter() - start:.1f} s, {log.packed().nbytes / 2**20:.1f} MB on disk")
+        rounds, ratios = log.convergence(2**20)
+        print(f"Switching win rate: {ratios[-1]:.4%} +/- {log.block_bootstrap(2**20).std():.4%} (block bootstrap)")
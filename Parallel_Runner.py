@@ -0,0 +1,75 @@
+"""
+Parallel_Runner in a Nutshell
+
+Splits a simulation of many rounds into chunks and plays the chunks on all CPU cores with a process pool.
+
+Every chunk gets its own independent random stream: chunk i always uses the i-th child of numpy.random.SeedSequence(seed)
+(the same child SeedSequence(seed).spawn() would give), no matter which worker plays it.
+The chunks only return counts (wins, or how often each marking was last), which we add up at the end,
+so for a given (seed, chunk_size) the result is bit-identical whatever the number of workers is.
+
+A job is any function job(n_rounds, rng=rng) returning counts, for example
+    functools.partial(Monty_Hall_Batch.count_wins, n_doors=1000, switch=True)
+    functools.partial(Squash_Batch.count_wins, p_serve=0.55, best_of=5)
+    functools.partial(LadyBug_Jump.last_marking_counts, n_markings=12)
+(it has to be picklable, so use module level functions, not lambdas).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+import LadyBug_Jump
+import Monty_Hall_Batch
+import Squash_Batch
+
+DEFAULT_CHUNK_SIZE = 2**20
+
+def chunk_rng(seed: int, chunk: int) -> np.random.Generator:
+    # The random stream of chunk number `chunk`: the chunk-th child of SeedSequence(seed)
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+
+
+def _play_chunk(job, seed: int, chunk: int, n_rounds: int) -> np.ndarray:
+    return np.atleast_1d(np.asarray(job(n_rounds, rng=chunk_rng(seed, chunk)), dtype=np.int64))
+
+
+def run_chunks(job, n_rounds: int, seed: int, workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE, first_chunk: int = 0) -> np.ndarray:
+    # Plays n_rounds rounds as chunks first_chunk, first_chunk + 1, ... and returns the counts of every chunk (one row per chunk).
+    if n_rounds < 1:
+        raise ValueError("n_rounds must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    sizes = [min(chunk_size, n_rounds - start) for start in range(0, n_rounds, chunk_size)]
+    chunks = range(first_chunk, first_chunk + len(sizes))
+
+    if workers == 1 or len(sizes) == 1:
+        return np.stack([_play_chunk(job, seed, chunk, size) for chunk, size in zip(chunks, sizes)])
+    with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+        # map keeps the order of the chunks, so the rows are always in chunk order
+        partial_counts = pool.map(partial(_play_chunk, job, seed), chunks, sizes)
+        return np.stack(list(partial_counts))
+
+
+def run_parallel(job, n_rounds: int, seed: int | None = None, workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    # Total counts of n_rounds rounds of `job`, played on `workers` processes.
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    return run_chunks(job, n_rounds, seed, workers, chunk_size).sum(axis=0)
+
+
+if __name__ == "__main__":
+    num_simulations = 100_000_000
+    seed = 2024
+    for n_doors in (3, 52, 1000):
+        wins = run_parallel(partial(Monty_Hall_Batch.count_wins, n_doors=n_doors, switch=True), num_simulations, seed)[0]
+        print(f"Monty Hall, {n_doors} doors: switching win rate {wins / num_simulations:.4%}")
+    wins = run_parallel(partial(Squash_Batch.count_wins, p_serve=0.55), num_simulations // 10, seed)[0]
+    print(f"Squash: starters win rate {wins / (num_simulations // 10):.4%}")
+    counts = run_parallel(partial(LadyBug_Jump.last_marking_counts, n_markings=12), num_simulations // 10, seed)
+    for marking in range(1, 12):
+        print(f" {marking}'clock: {counts[marking] / counts.sum():.3%}")
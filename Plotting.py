@@ -0,0 +1,248 @@
+"""
+Plotting in a Nutshell
+
+The scripts hand every single round to plt.plot. A PNG of 2000 pixels width cannot show more than ~2000 x-positions anyway,
+so with 10^7 rounds almost all of the plotting time and memory is wasted. Here we
+1. downsample a convergence series before drawing it: log-spaced points (the interesting part of a convergence curve is at the start),
+   or LTTB (largest triangle three buckets, keeps the visual shape of the curve), plus a min/max envelope per bucket,
+   so that no spike disappears,
+2. draw confidence bands from the counts and checkpoints of Streaming_Stats instead of per-round arrays, and
+3. render the figures with the headless Agg backend in a background process, so the next simulation runs while the last figure is drawn.
+
+    python Plotting.py                   # all five PNGs of the scripts, 10^7 rounds each
+    python Plotting.py --rounds 1e9
+    python Plotting.py --rounds 1e9 --seed 2024 --cache    # Counts and checkpoints from (and into) .sim_cache/
+
+matplotlib is only imported in the rendering process.
+"""
+
+import argparse
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from Result_Cache import DEFAULT_DIRECTORY, ResultCache
+from Streaming_Stats import CategoryAccumulator, WinRateAccumulator, wilson_interval
+
+DEFAULT_POINTS = 2000
+
+# ---- Downsampling ----
+
+def log_spaced_indices(n: int, n_points: int = DEFAULT_POINTS) -> np.ndarray:
+    # About n_points indices between 0 and n - 1, evenly spaced on a log scale (always including the first and the last one)
+    if n <= n_points:
+        return np.arange(n)
+    return np.unique(np.geomspace(1, n, n_points).astype(np.int64) - 1)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_points: int = DEFAULT_POINTS) -> tuple[np.ndarray, np.ndarray]:
+    # Largest triangle three buckets: keeps the first and last point, and from every bucket in between the point that forms
+    # the largest triangle with the point kept in the previous bucket and the average of the next bucket.
+    n = x.size
+    if n <= n_points or n_points < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_points - 1).astype(np.int64)
+    averages_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    averages_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    kept = np.empty(n_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    for bucket in range(n_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_x, next_y = (averages_x[bucket + 1], averages_y[bucket + 1]) if bucket + 1 < averages_x.size else (x[-1], y[-1])
+        previous = kept[bucket]
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous]) - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        kept[bucket + 1] = start + int(np.argmax(area))
+    return x[kept], y[kept]
+
+
+def min_max_envelope(x: np.ndarray, y: np.ndarray, n_buckets: int = DEFAULT_POINTS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Lowest and highest value in each of n_buckets buckets (x is the first x of each bucket)
+    if x.size <= n_buckets:
+        return x, y, y
+    starts = np.linspace(0, x.size, n_buckets, endpoint=False).astype(np.int64)
+    return x[starts], np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_points: int = DEFAULT_POINTS, method: str = "lttb") -> tuple[np.ndarray, np.ndarray]:
+    x, y = np.asarray(x), np.asarray(y)
+    if method == "log":
+        kept = log_spaced_indices(x.size, n_points)
+        return x[kept], y[kept]
+    if method == "lttb":
+        return lttb(x, y, n_points)
+    raise ValueError("method must be 'log' or 'lttb'")
+
+
+# ---- Figures ----
+
+class Figure(NamedTuple):
+    # Everything needed to draw one PNG; small enough to be sent to the rendering process.
+    filename: str
+    title: str
+    xlabel: str
+    ylabel: str
+    x: np.ndarray
+    y: np.ndarray
+    low: np.ndarray | None = None  # Confidence band (or error bars for bar charts)
+    high: np.ndarray | None = None
+    lines: tuple = ()  # (y, label) of horizontal reference lines
+    ylim: tuple | None = None
+    log_x: bool = False
+    bars: bool = False
+    dpi: int = 200
+
+
+def convergence_figure(accumulator: WinRateAccumulator, filename: str, title: str, lines: tuple = (), ylim: tuple | None = None) -> Figure:
+    # Cumulative win ratio at the checkpoints of a WinRateAccumulator, with its Wilson confidence band
+    rounds, ratios = accumulator.checkpoint_series()
+    low, high = wilson_interval(np.round(ratios * rounds), rounds, accumulator.confidence)
+    return Figure(filename, title, "n = number of rounds played", "Cumulative win percentage", rounds, ratios, low, high, lines, ylim, log_x=True)
+
+
+def distribution_figure(accumulator: CategoryAccumulator, filename: str = "Ladybug_Distribution.png") -> Figure:
+    # Last-marking frequencies of the ladybug as bars 1 .. 12 (marking 12 is category 0), with confidence intervals
+    order = np.roll(np.arange(accumulator.counts.size), -1)
+    low, high = accumulator.interval()
+    markings = np.arange(1, accumulator.counts.size + 1)
+    return Figure(filename, "Ladybug – Probability of Each Marking Being Last", "Clock Marking", "Probability of Being Last Visited",
+                  markings, accumulator.frequencies[order], low[order], high[order], bars=True, dpi=300)
+
+
+def render(figure: Figure) -> str:
+    # Draws one figure with the Agg backend (no display needed) and returns its file name.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    if figure.bars:
+        errors = None if figure.low is None else [np.maximum(figure.y - figure.low, 0), np.maximum(figure.high - figure.y, 0)]
+        ax.bar(figure.x, figure.y, yerr=errors, color="skyblue", edgecolor="black", capsize=3)
+        ax.set_xticks(figure.x)
+    else:
+        if figure.low is not None:
+            ax.fill_between(figure.x, figure.low, figure.high, alpha=0.3, label="95% confidence band")
+        ax.plot(figure.x, figure.y)
+        ax.set_xlim(figure.x[0], figure.x[-1])
+    for line, (y, label) in enumerate(figure.lines, start=1):
+        ax.axhline(y=y, linestyle="--", alpha=0.6, color=f"C{line}", label=label)
+    if figure.log_x:
+        ax.set_xscale("log")
+    if figure.ylim is not None:
+        ax.set_ylim(*figure.ylim)
+    ax.set_title(figure.title)
+    ax.set_xlabel(figure.xlabel)
+    ax.set_ylabel(figure.ylabel)
+    if figure.lines or (figure.low is not None and not figure.bars):
+        ax.legend()
+    fig.savefig(figure.filename, dpi=figure.dpi)
+    plt.close(fig)
+    return figure.filename
+
+
+class Renderer:
+    # Renders figures in a background process while the caller goes on simulating:
+    #     with Renderer() as renderer:
+    #         renderer.submit(figure)
+    # Leaving the with block waits until every figure is saved.
+
+    def __init__(self, workers: int = 1):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.futures: list[Future] = []
+
+    def submit(self, figure: Figure) -> Future:
+        future = self.pool.submit(render, figure)
+        self.futures.append(future)
+        return future
+
+    def __enter__(self) -> "Renderer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            for future in self.futures:
+                future.result()  # Raises the errors of the rendering process here
+        finally:
+            self.pool.shutdown()
+
+
+# ---- All five figures of the scripts ----
+
+def _play_to_checkpoints(accumulator, job, rounds: int, rng: np.random.Generator, points_per_decade: int, max_batch: int = 2**20):
+    # Plays exactly up to every log-spaced checkpoint, so that the curve has points from the very first round on.
+    targets = np.unique(np.geomspace(1, rounds, max(2, int(points_per_decade * np.log10(max(rounds, 10))))).astype(np.int64))
+    for target in targets:
+        while accumulator.rounds < target:
+            size = int(min(target - accumulator.rounds, max_batch))
+            accumulator.update(job(size, rng=rng), size)
+    return accumulator
+
+
+def _cached_accumulator(cache: ResultCache, game: str, job, params: dict, seed: int, rounds: int, points_per_decade: int, workers: int | None) -> WinRateAccumulator:
+    # A WinRateAccumulator with the log-spaced checkpoints stored by the cache (played on `workers` processes if they are missing)
+    accumulator = WinRateAccumulator(checkpoints_per_decade=points_per_decade)
+    for checkpoint, counts in zip(*cache.checkpoints(game, job, params, "vectorized", seed, rounds, workers, checkpoints_per_decade=points_per_decade)):
+        accumulator.update(counts[0] - accumulator.wins, checkpoint - accumulator.rounds)
+    return accumulator
+
+
+def all_figures(rounds: int = 10**7, directory: str | os.PathLike = ".", seed: int | None = None, points_per_decade: int = 100,
+                cache: ResultCache | None = None, workers: int | None = None) -> list[str]:
+    # Simulates and renders monty_hall_stay.png, monty_hall_stay_FrenchCards.png, monty_hall_1000Doors_stay.png,
+    # SquashServe.png and Ladybug_Distribution.png in one pass. Each figure is rendered while the next game is simulated.
+    # With a cache (and a seed), the counts and checkpoints come from the cache, and only the missing chunks are played
+    # (on `workers` processes), so drawing the figures again, or with more rounds, does not play the same rounds twice.
+    from functools import partial
+
+    import LadyBug_Jump
+    import Monty_Hall_Batch
+    import Squash_Batch
+
+    rng = np.random.default_rng(seed)
+
+    def convergence(game: str, function, **params) -> WinRateAccumulator:
+        if cache is None:
+            return _play_to_checkpoints(WinRateAccumulator(checkpoints_per_decade=points_per_decade), partial(function, **params), rounds, rng, points_per_decade)
+        return _cached_accumulator(cache, game, partial(function, **params), params, seed, rounds, points_per_decade, workers)
+
+    games = [
+        ("monty_hall_stay.png", 3, (0.1, 0.6)),
+        ("monty_hall_stay_FrenchCards.png", 52, (0.01, 0.1)),
+        ("monty_hall_1000Doors_stay.png", 1000, (0.0, 0.1)),
+    ]
+    with Renderer() as renderer:
+        for filename, n_doors, ylim in games:
+            stick = convergence("monty_hall", Monty_Hall_Batch.count_wins, n_doors=n_doors, switch=False)
+            renderer.submit(convergence_figure(stick, os.path.join(directory, filename), f"Win ratio over n if we stay (no switch), {n_doors} doors", ((1 / n_doors, f"Theoretical 1/{n_doors}"),), ylim))
+
+        squash = convergence("squash", Squash_Batch.count_wins, p_serve=0.55)
+        renderer.submit(convergence_figure(squash, os.path.join(directory, "SquashServe.png"), "Win ratio for the player who serves first in a squash match",
+                                           ((0.55, "Theoretical 55% win rate"), (0.5, "50% win rate")), (0.1, 0.6)))
+
+        ladybug = CategoryAccumulator(12)
+        if cache is None:
+            ladybug.update(LadyBug_Jump.last_marking_counts(rounds, 12, rng=rng), rounds)
+        else:
+            ladybug.update(cache.run("ladybug", partial(LadyBug_Jump.last_marking_counts, n_markings=12), {"n_markings": 12}, "vectorized", seed, rounds, workers), rounds)
+        renderer.submit(distribution_figure(ladybug, os.path.join(directory, "Ladybug_Distribution.png")))
+        return [future.result() for future in renderer.futures]
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Simulate and draw all five figures of the scripts.")
+    parser.add_argument("--rounds", type=float, default=1e7)
+    parser.add_argument("--directory", default=".")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_DIRECTORY, default=None, metavar="DIRECTORY",
+                        help=f"take the counts and checkpoints from this result cache (default {DEFAULT_DIRECTORY}), needs --seed")
+    args = parser.parse_args()
+    if args.cache is not None and args.seed is None:
+        parser.error("--cache needs a --seed (a run without a seed is never asked for again)")
+    start = time.perf_counter()
+    for filename in all_figures(int(args.rounds), args.directory, args.seed, cache=None if args.cache is None else ResultCache(args.cache)):
+        print(f"Diagram saved as {filename}")
+    print(f"Done in {time.perf_counter() - start:.1f} s")
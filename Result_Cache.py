@@ -0,0 +1,210 @@
+"""
+Result_Cache in a Nutshell
+
+Simulations are expensive, plots and reports are cheap. So let's never play the same rounds twice!
+
+Every run of Parallel_Runner is determined by (game, parameters, engine, seed, chunk size, number of rounds):
+chunk i always uses the same random stream. So we store the counts of every chunk in a compressed .npz file,
+named after a hash of (game, parameters, engine, seed, chunk size), and
+1. asking for the same run again costs no simulation at all,
+2. asking for fewer rounds is answered from the first chunks, and
+3. asking for more rounds (say 10^7 after 10^6) only plays the missing chunks and adds them to the file.
+The cache uses chunks of 10^5 rounds, so round numbers of rounds end on a chunk boundary. Only a trailing partial chunk
+(the last 54,321 rounds of 1,054,321) is played again when the run is extended, since a full chunk uses its stream differently.
+With checkpoints_per_decade, every chunk is played in batches that end on a log-spaced grid of rounds (the same grid for every
+run length), and the cumulative counts at these checkpoints are stored next to the chunk counts, for the convergence plots.
+Such a run uses its random streams differently, so it has a file of its own.
+Plotting.all_figures and simulate.py use the cache with --cache.
+
+The cache directory has a size limit; when it is full, the least recently used files are deleted first.
+"""
+
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from Parallel_Runner import chunk_rng, run_chunks
+
+DEFAULT_DIRECTORY = ".sim_cache"
+DEFAULT_MAX_BYTES = 256 * 2**20
+# A round number of rounds (10^6, 2 * 10^7, ...) ends on a chunk boundary, so a longer run keeps every chunk of the shorter one.
+# (With 2^20 rounds per chunk, going from 10^6 to 10^7 rounds would play the 10^6 cached rounds of the partial chunk again.)
+DEFAULT_CHUNK_SIZE = 10**5
+
+def log_grid(start: int, stop: int, per_decade: int) -> np.ndarray:
+    # The points ceil(10^(i / per_decade)) between start (excluded) and stop (included). The grid does not depend on the
+    # length of the run, so a longer run has the same checkpoints as a shorter one, and a few more.
+    if stop <= start:
+        return np.zeros(0, dtype=np.int64)
+    first = math.floor(per_decade * math.log10(start + 1)) - 1
+    last = math.ceil(per_decade * math.log10(stop)) + 1
+    points = np.unique(np.ceil(10 ** (np.arange(max(first, 0), last + 1) / per_decade)).astype(np.int64))
+    return points[(points > start) & (points <= stop)]
+
+
+def _play_chunk_with_checkpoints(job, seed: int, per_decade: int, chunk: int, n_rounds: int, offset: int) -> tuple[np.ndarray, list]:
+    # Plays chunk number `chunk` (rounds offset + 1 .. offset + n_rounds of the run) in batches that end on the log grid.
+    # Returns the counts of the chunk and (rounds of the run, counts of the chunk so far) at every grid point and at its end.
+    rng = chunk_rng(seed, chunk)
+    counts, rows, played = 0, [], offset
+    for target in np.append(log_grid(offset, offset + n_rounds - 1, per_decade), offset + n_rounds):
+        counts = counts + np.atleast_1d(np.asarray(job(int(target - played), rng=rng), dtype=np.int64))
+        played = int(target)
+        rows.append((played, counts))
+    return counts, rows
+
+
+class ResultCache:
+
+    def __init__(self, directory: str | os.PathLike = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _description(game: str, params: dict, engine: str, seed: int, chunk_size: int, checkpoints_per_decade: int) -> dict:
+        description = {"game": game, "params": params, "engine": engine, "seed": seed, "chunk_size": chunk_size}
+        if checkpoints_per_decade:
+            description["checkpoints_per_decade"] = checkpoints_per_decade  # The chunks are played in other batches
+        return description
+
+    def path(self, game: str, params: dict, engine: str, seed: int, chunk_size: int, checkpoints_per_decade: int = 0) -> Path:
+        # The rounds are not part of the file name, so a longer run of the same stream extends the same file.
+        description = json.dumps(self._description(game, params, engine, seed, chunk_size, checkpoints_per_decade), sort_keys=True, default=str)
+        return self.directory / (hashlib.sha256(description.encode()).hexdigest()[:32] + ".npz")
+
+    def _load_chunks(self, path: Path) -> tuple[np.ndarray, int, np.ndarray] | None:
+        # Counts of every chunk, the number of rounds stored in the file and the checkpoints (rounds, cumulative counts) of the run
+        try:
+            with np.load(path) as stored:
+                chunk_counts, rounds = stored["chunk_counts"], int(stored["rounds"])
+                checkpoints = stored["checkpoints"] if "checkpoints" in stored else np.zeros((0, chunk_counts.shape[1] + 1), dtype=np.int64)
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path)  # Mark as recently used
+        return chunk_counts, rounds, checkpoints
+
+    def _store_chunks(self, path: Path, chunk_counts: np.ndarray, rounds: int, checkpoints: np.ndarray, description: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f".{os.getpid()}.tmp.npz")  # One per process, the points of a sweep may share the cache
+        np.savez_compressed(temporary, chunk_counts=chunk_counts, rounds=rounds, checkpoints=checkpoints,
+                            description=json.dumps(description, sort_keys=True, default=str))
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self) -> None:
+        # Delete the least recently used files until the cache fits into max_bytes.
+        if not self.directory.exists():
+            return
+        files = []
+        for file in self.directory.glob("*.npz"):
+            try:
+                status = file.stat()
+            except FileNotFoundError:  # Deleted by another process in the meantime
+                continue
+            files.append((status.st_mtime, status.st_size, file))
+        files.sort(key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in files)
+        for _, size, file in files:
+            if total <= self.max_bytes:
+                break
+            total -= size
+            file.unlink(missing_ok=True)
+
+    def _play(self, job, n_rounds: int, seed: int, workers: int | None, chunk_size: int, first_chunk: int, checkpoints_per_decade: int) -> tuple[np.ndarray, np.ndarray]:
+        # Counts of the chunks first_chunk, first_chunk + 1, ... and the checkpoints of these chunks (counts from the first of them on)
+        if not checkpoints_per_decade:
+            counts = run_chunks(job, n_rounds, seed, workers, chunk_size, first_chunk)
+            return counts, np.zeros((0, counts.shape[1] + 1), dtype=np.int64)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        sizes = [min(chunk_size, n_rounds - start) for start in range(0, n_rounds, chunk_size)]
+        chunks = range(first_chunk, first_chunk + len(sizes))
+        offsets = [first_chunk * chunk_size + start for start in range(0, n_rounds, chunk_size)]
+        play = partial(_play_chunk_with_checkpoints, job, seed, checkpoints_per_decade)
+        if workers == 1 or len(sizes) == 1:
+            played = [play(chunk, size, offset) for chunk, size, offset in zip(chunks, sizes, offsets)]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+                played = list(pool.map(play, chunks, sizes, offsets))
+        counts = np.stack([chunk_counts for chunk_counts, _ in played])
+        before = np.cumsum(counts, axis=0) - counts  # Counts of the earlier chunks of this call
+        checkpoints = [np.concatenate(([rounds], earlier + chunk_so_far)) for (_, rows), earlier in zip(played, before) for rounds, chunk_so_far in rows]
+        return counts, np.array(checkpoints, dtype=np.int64)
+
+    def _chunks_and_checkpoints(self, game: str, job, params: dict, engine: str, seed: int, rounds: int, workers: int | None,
+                                chunk_size: int, checkpoints_per_decade: int) -> tuple[np.ndarray, np.ndarray]:
+        # Counts of every chunk of the run and its checkpoints up to `rounds`, playing only the chunks that are not cached yet.
+        if seed is None:
+            raise ValueError("only runs with a fixed seed can be cached")
+        path = self.path(game, params, engine, seed, chunk_size, checkpoints_per_decade)
+        full_chunks, last_chunk = divmod(rounds, chunk_size)
+        needed_chunks = full_chunks + (last_chunk > 0)
+
+        cached = self._load_chunks(path)
+        if cached is None:
+            cached_counts, cached_rounds, cached_checkpoints = None, 0, None
+        else:
+            cached_counts, cached_rounds, cached_checkpoints = cached
+        cached_full_chunks = cached_rounds // chunk_size
+
+        if cached_rounds == rounds or (last_chunk == 0 and cached_full_chunks >= needed_chunks):
+            # Everything we need is in the cache
+            return cached_counts[:needed_chunks], cached_checkpoints[cached_checkpoints[:, 0] <= rounds]
+        if cached_full_chunks >= full_chunks and cached_counts is not None:
+            # Only the last, shorter chunk is missing (it does not use the same draws as the full chunk with the same number)
+            last, last_checkpoints = self._play(job, last_chunk, seed, 1, chunk_size, full_chunks, checkpoints_per_decade)
+            kept = cached_counts[:full_chunks]
+            last_checkpoints[:, 1:] += kept.sum(axis=0)
+            return np.concatenate((kept, last)), np.concatenate((cached_checkpoints[cached_checkpoints[:, 0] <= full_chunks * chunk_size], last_checkpoints))
+
+        # Play the missing chunks, starting after the last full chunk we have
+        new, new_checkpoints = self._play(job, rounds - cached_full_chunks * chunk_size, seed, workers, chunk_size, cached_full_chunks, checkpoints_per_decade)
+        if cached_counts is None or cached_full_chunks == 0:
+            counts, checkpoints = new, new_checkpoints
+        else:
+            kept = cached_counts[:cached_full_chunks]
+            new_checkpoints[:, 1:] += kept.sum(axis=0)
+            counts = np.concatenate((kept, new))
+            checkpoints = np.concatenate((cached_checkpoints[cached_checkpoints[:, 0] <= cached_full_chunks * chunk_size], new_checkpoints))
+        description = self._description(game, params, engine, seed, chunk_size, checkpoints_per_decade)
+        self._store_chunks(path, counts, rounds, checkpoints, description)
+        return counts, checkpoints
+
+    def chunk_counts(self, game: str, job, params: dict, engine: str, seed: int, rounds: int, workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     checkpoints_per_decade: int = 0) -> np.ndarray:
+        # Counts of every chunk of the run, playing only the chunks that are not cached yet.
+        # With checkpoints_per_decade, every chunk is played in batches ending on the log grid, so checkpoints can be stored as well.
+        return self._chunks_and_checkpoints(game, job, params, engine, seed, rounds, workers, chunk_size, checkpoints_per_decade)[0]
+
+    def run(self, game: str, job, params: dict, engine: str, seed: int, rounds: int, workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+            checkpoints_per_decade: int = 0) -> np.ndarray:
+        # Total counts of the run (without checkpoints_per_decade the same result as Parallel_Runner.run_parallel with the same seed and chunk size).
+        return self.chunk_counts(game, job, params, engine, seed, rounds, workers, chunk_size, checkpoints_per_decade).sum(axis=0)
+
+    def checkpoints(self, game: str, job, params: dict, engine: str, seed: int, rounds: int, workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    checkpoints_per_decade: int = 20) -> tuple[np.ndarray, np.ndarray]:
+        # Rounds played and cumulative counts at checkpoints_per_decade log-spaced checkpoints per decade
+        # (and at every chunk boundary), for the convergence plots.
+        _, checkpoints = self._chunks_and_checkpoints(game, job, params, engine, seed, rounds, workers, chunk_size, checkpoints_per_decade)
+        return checkpoints[:, 0], checkpoints[:, 1:]
+
+
+if __name__ == "__main__":
+    import time
+    from functools import partial
+
+    import Monty_Hall_Batch
+
+    cache = ResultCache()
+    params = {"n_doors": 1000, "switch": True}
+    job = partial(Monty_Hall_Batch.count_wins, **params)
+    for rounds in (10**6, 10**7, 10**7):
+        start = time.perf_counter()
+        wins = cache.run("monty_hall", job, params, "batch", 2024, rounds)[0]
+        print(f"{rounds} games: switching win rate {wins / rounds:.4%} ({time.perf_counter() - start:.2f} s)")
@@ -0,0 +1,137 @@
+"""
+Squash_Batch in a Nutshell
+
+The same matches as in Squash_Serve.py, but instead of playing one rally per Python loop we play thousands of matches side by side:
+every loop plays one rally in each match that is still running, keeping the scores and the current server in NumPy arrays.
+Finished matches are retired with a mask, and once enough of them are finished we compact the arrays so we only carry the running ones.
+
+On top of the single game of Squash_Serve.match, we can also play
+1. best of 5 (or any odd number of) games, where the winner of a game serves first in the next one, and
+2. the old "hand-in hand-out" scoring, where only the server can score a point and the receiver winning a rally just wins the serve,
+   next to the PAR (point-a-rally) scoring of Squash_Serve.match.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 2**20
+SCORING_SYSTEMS = ("par", "hand-in")
+
+class MatchBatch(NamedTuple):
+    player1_wins: np.ndarray  # True if player 1 (the first server) won the match
+    rallies: np.ndarray  # Number of rallies played in the match
+    score1: np.ndarray  # Games won by player 1 (points in the final game if best_of is 1)
+    score2: np.ndarray  # Games won by player 2 (points in the final game if best_of is 1)
+
+
+def play_batch(n_matches: int, p_serve: float = 0.55, target: int = 11, win_by: int = 2, best_of: int = 1, scoring: str = "par", rng: np.random.Generator | None = None, draws=None) -> MatchBatch:
+    # draws(match_index, rally) -> uniform random numbers can replace rng, to share the random numbers of every rally
+    # between several simulations (see Variance_Reduction.py).
+    if scoring not in SCORING_SYSTEMS:
+        raise ValueError(f"scoring must be one of {SCORING_SYSTEMS}")
+    if best_of < 1 or best_of % 2 == 0:
+        raise ValueError("best_of must be a positive odd number")
+    if target < 1 or win_by < 1:
+        raise ValueError("target and win_by must be at least 1")
+    if not 0 < p_serve <= 1:
+        raise ValueError("p_serve must be greater than 0 and at most 1 (at 0 the match never ends)")
+    if rng is None:
+        rng = np.random.default_rng()
+    games_needed = best_of // 2 + 1
+
+    # Results, by the original index of the match
+    player1_wins = np.zeros(n_matches, dtype=bool)
+    rallies_played = np.zeros(n_matches, dtype=np.int64)
+    final1 = np.zeros(n_matches, dtype=np.int64)
+    final2 = np.zeros(n_matches, dtype=np.int64)
+
+    # State of the matches we still carry around (compacted from time to time), in small integer types to save memory bandwidth
+    index = np.arange(n_matches)
+    running = np.ones(n_matches, dtype=bool)
+    points1 = np.zeros(n_matches, dtype=np.int16)
+    points2 = np.zeros(n_matches, dtype=np.int16)
+    games1 = np.zeros(n_matches, dtype=np.int8)
+    games2 = np.zeros(n_matches, dtype=np.int8)
+    player1_serves = np.ones(n_matches, dtype=bool)  # Player 1 is the player who starts serving.
+    n_running = n_matches
+    rally = 0
+
+    while n_running:
+        # Play one rally in every match
+        rally += 1
+        if draws is None:
+            player1_wins_rally = rng.random(index.size) < p_serve  # True if the server wins the rally ...
+            np.equal(player1_wins_rally, player1_serves, out=player1_wins_rally)  # ... and now True if player 1 wins it
+        else:
+            # Shared draws are compared from player 1's side: she wins the rally with p_serve when she serves, with 1 - p_serve otherwise.
+            # So a small number is always good for player 1, which is what common and antithetic draws need.
+            player1_wins_rally = draws(index, rally) < (1 - p_serve) + (2 * p_serve - 1) * player1_serves
+        if scoring == "par":
+            points1 += player1_wins_rally
+            points2 += ~player1_wins_rally
+        else:
+            # Hand-in: only the server scores, the receiver winning the rally just gets the serve
+            points1 += player1_wins_rally & player1_serves
+            points2 += ~(player1_wins_rally | player1_serves)
+        player1_serves = player1_wins_rally
+
+        # Games that just ended: the winner of the game serves first in the next one (she won the last rally, so she serves already)
+        game_over = (np.maximum(points1, points2) >= target) & (np.abs(points1 - points2) >= win_by)
+        if not game_over.any():
+            continue
+        player1_won_game = game_over & (points1 > points2)
+        games1 += player1_won_game
+        games2 += game_over & ~player1_won_game
+
+        # Matches that just ended: record the results and retire them
+        match_over = running & ((games1 == games_needed) | (games2 == games_needed))
+        if match_over.any():
+            done = index[match_over]
+            player1_wins[done] = games1[match_over] == games_needed
+            rallies_played[done] = rally
+            if best_of == 1:
+                final1[done] = points1[match_over]
+                final2[done] = points2[match_over]
+            else:
+                final1[done] = games1[match_over]
+                final2[done] = games2[match_over]
+            running &= ~match_over
+            n_running -= int(np.count_nonzero(match_over))
+
+        not_over = ~game_over
+        points1 *= not_over
+        points2 *= not_over
+
+        # Compact once at least a quarter of the carried matches are finished
+        if n_running and n_running * 4 <= index.size * 3:
+            index, points1, points2, games1, games2, player1_serves = (
+                array[running] for array in (index, points1, points2, games1, games2, player1_serves)
+            )
+            running = np.ones(index.size, dtype=bool)
+
+    return MatchBatch(player1_wins, rallies_played, final1, final2)
+
+
+def count_wins(n_matches: int, p_serve: float = 0.55, target: int = 11, win_by: int = 2, best_of: int = 1, scoring: str = "par", rng: np.random.Generator | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    # Number of matches won by the first server, played in chunks to keep the memory bounded.
+    if rng is None:
+        rng = np.random.default_rng()
+    wins = 0
+    for start in range(0, n_matches, chunk_size):
+        size = min(chunk_size, n_matches - start)
+        wins += int(np.count_nonzero(play_batch(size, p_serve, target, win_by, best_of, scoring, rng).player1_wins))
+    return wins
+
+
+def win_ratio(n_matches: int, p_serve: float = 0.55, target: int = 11, win_by: int = 2, best_of: int = 1, scoring: str = "par", rng: np.random.Generator | None = None) -> float:
+    return count_wins(n_matches, p_serve, target, win_by, best_of, scoring, rng) / n_matches
+
+
+if __name__ == "__main__":
+    num_simulations = 1_000_000
+    rng = np.random.default_rng()
+    for scoring, target in (("par", 11), ("hand-in", 9)):
+        for best_of in (1, 5):
+            matches = play_batch(num_simulations, target=target, best_of=best_of, scoring=scoring, rng=rng)
+            print(f"{scoring} to {target}, best of {best_of}: starters win rate {matches.player1_wins.mean():.2%}, {matches.rallies.mean():.1f} rallies per match")
@@ -0,0 +1,162 @@
+"""
+Squash_Exact in a Nutshell
+
+In Squash_Serve.py we estimate the advantage of serving first by simulating 10,000 matches.
+But a match is a small game: everything that matters is (points of player 1, points of player 2, who serves).
+So we can compute the exact chance of player 1 (the first server) winning from any state, following the chances of every score from there on.
+
+Same rules as in Squash_Serve.match: every rally scores a point (PAR scoring), the winner of the rally serves next,
+and the match goes to `target` points with at least `win_by` points difference.
+
+Once both players are close enough to the target, only the difference of the points matters (and who serves),
+so the long "win by two" tail is a small closed system. For win_by = 2 it even has a closed form:
+with q = 1 - p_serve, at a tie player 1 wins with probability 1 / (1 + 2q) if she serves and 2q / (1 + 2q) if she doesn't.
+
+The chance of reaching each state before the tail only depends on the rules, not on the serve probability:
+it is a polynomial in p_serve and 1 - p_serve, which we build once per (target, win_by, starting state) and cache.
+So win_probability accepts a single serve probability or a whole NumPy array of them, and sweeping 10^5 serve probabilities is a single call.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+def _tail_values(p, win_by: int) -> dict:
+    # Chance of player 1 winning, when only the point difference d (-win_by < d < win_by) and the server matter.
+    q = 1 - p
+    if win_by == 2:
+        tie_serving = 1 / (1 + 2 * q)
+        tie_receiving = 2 * q / (1 + 2 * q)
+        return {
+            (0, 1): tie_serving,
+            (0, 2): tie_receiving,
+            (1, 1): p + q * tie_receiving,
+            (1, 2): p * tie_receiving + q,
+            (-1, 1): p * tie_serving,
+            (-1, 2): q * tie_serving,
+        }
+
+    # General margin: solve the small linear system (one per serve probability).
+    states = [(d, server) for d in range(-win_by + 1, win_by) for server in (1, 2)]
+    index = {state: i for i, state in enumerate(states)}
+    p_array = np.atleast_1d(np.asarray(p, dtype=float))
+    matrix = np.zeros((p_array.size, len(states), len(states)))
+    constant = np.zeros((p_array.size, len(states)))
+    for (d, server), i in index.items():
+        matrix[:, i, i] = 1
+        # Player 1 wins the rally with p_serve if she serves, with 1 - p_serve otherwise, and serves next.
+        p1_rally = p_array if server == 1 else 1 - p_array
+        for next_d, next_server, chance in ((d + 1, 1, p1_rally), (d - 1, 2, 1 - p1_rally)):
+            if next_d >= win_by:
+                constant[:, i] += chance
+            elif next_d > -win_by:
+                matrix[:, i, index[(next_d, next_server)]] -= chance
+    solution = np.linalg.solve(matrix, constant[..., None])[..., 0]
+    if np.ndim(p) == 0:
+        return {state: float(solution[0, i]) for state, i in index.items()}
+    return {state: solution[:, i].reshape(np.shape(p)) for state, i in index.items()}
+
+
+def _add_homogeneous(first: np.ndarray | None, second: np.ndarray) -> np.ndarray:
+    # Sum of two homogeneous polynomials; the lower degree one is multiplied by (p + q)^k = 1 first.
+    if first is None:
+        return second
+    if first.size < second.size:
+        first, second = second, first
+    lift = np.array([1.0])
+    for _ in range(first.size - second.size):
+        lift = np.convolve(lift, [1.0, 1.0])
+    return first + np.convolve(second, lift)
+
+
+@lru_cache(maxsize=1024)
+def _reach_polynomials(target: int, win_by: int, score1: int, score2: int, server: int) -> tuple[np.ndarray, dict]:
+    # Starting from (score1, score2, server): the chance of winning before the tail, and of entering the tail at each (difference, server).
+    # Every rally multiplies by p or by q = 1 - p, so each chance is a homogeneous polynomial sum(c[i] * p^i * q^(degree - i)),
+    # stored as its coefficients c (all of them non-negative). It only depends on the rules, so we compute it once and cache it.
+    tail_from = target - win_by
+    reach = {(score1, score2, server): np.array([1.0])}
+    win = None
+    tail_entries = {}
+    # States are visited in the order of rallies played, so everything flowing into a state is known before we leave it.
+    while reach:
+        points1, points2, serving = min(reach, key=lambda state: state[0] + state[1])
+        coefficients = reach.pop((points1, points2, serving))
+        server_wins = np.concatenate(([0.0], coefficients))
+        receiver_wins = np.concatenate((coefficients, [0.0]))
+        player1_point, player2_point = (server_wins, receiver_wins) if serving == 1 else (receiver_wins, server_wins)
+        for state, chance in (((points1 + 1, points2, 1), player1_point), ((points1, points2 + 1, 2), player2_point)):
+            next1, next2, next_server = state
+            if next1 >= target and next1 - next2 >= win_by:
+                win = _add_homogeneous(win, chance)
+            elif next2 >= target and next2 - next1 >= win_by:
+                continue
+            elif min(next1, next2) >= tail_from:
+                key = (next1 - next2, next_server)
+                tail_entries[key] = _add_homogeneous(tail_entries.get(key), chance)
+            else:
+                reach[state] = _add_homogeneous(reach.get(state), chance)
+    if win is None:
+        win = np.array([0.0])
+    for coefficients in (win, *tail_entries.values()):
+        coefficients.setflags(write=False)
+    return win, tail_entries
+
+
+def _evaluate_homogeneous(coefficients: np.ndarray, p: np.ndarray) -> np.ndarray:
+    # sum(c[i] * p^i * q^(degree - i)), evaluated through the ratio p/q or q/p (whichever is at most 1), so nothing cancels or overflows.
+    q = 1 - p
+    degree = coefficients.size - 1
+    p_smaller = p <= q
+    ratio = np.where(p_smaller, p, q) / np.where(p_smaller, q, p)
+    return np.where(p_smaller, q**degree * np.polyval(coefficients[::-1], ratio), p**degree * np.polyval(coefficients, ratio))
+
+
+def win_probability(p_serve, target: int = 11, win_by: int = 2, score1: int = 0, score2: int = 0, server: int = 1):
+    # Exact chance of player 1 winning the match from (score1, score2) with `server` serving (1 = player 1, who served first).
+    if server not in (1, 2):
+        raise ValueError("server must be 1 or 2")
+    if target < 1 or win_by < 1:
+        raise ValueError("target and win_by must be at least 1")
+    p = np.asarray(p_serve, dtype=float)
+    if not np.all((p > 0) & (p <= 1)):
+        raise ValueError("p_serve must be greater than 0 and at most 1 (at 0 the match never ends)")
+    if score1 >= target and score1 - score2 >= win_by:
+        return 1.0
+    if score2 >= target and score2 - score1 >= win_by:
+        return 0.0
+    tail = _tail_values(float(p_serve) if np.ndim(p_serve) == 0 else p, win_by)
+    if min(score1, score2) >= target - win_by:
+        # Already in the tail: only the difference matters
+        return tail[(score1 - score2, server)]
+
+    win, tail_entries = _reach_polynomials(target, win_by, score1, score2, server)
+    result = _evaluate_homogeneous(win, p)
+    for key, coefficients in tail_entries.items():
+        result = result + _evaluate_homogeneous(coefficients, p) * tail[key]
+    return float(result) if np.ndim(p_serve) == 0 else result
+
+
+def serve_probability_for_win_rate(win_rate: float, target: int = 11, win_by: int = 2, tolerance: float = 1e-12) -> float:
+    # Which serve-win probability gives the first server a match win rate of `win_rate`? (Bisection on the cached polynomials.)
+    low, high = 1e-9, 1 - 1e-9
+    f_low = win_probability(low, target, win_by) - win_rate
+    f_high = win_probability(high, target, win_by) - win_rate
+    if f_low * f_high > 0:
+        raise ValueError(f"no serve probability gives a win rate of {win_rate} (reachable: {f_low + win_rate:.6f} .. {f_high + win_rate:.6f})")
+    while high - low > tolerance:
+        middle = (low + high) / 2
+        f_middle = win_probability(middle, target, win_by) - win_rate
+        if f_middle == 0:
+            return middle
+        if (f_middle < 0) == (f_low < 0):
+            low, f_low = middle, f_middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+if __name__ == "__main__":
+    print(f"Starters win rate (exact): {win_probability(0.55):.4%}")
+    print(f"Serve advantage needed for a 55% match win rate: {serve_probability_for_win_rate(0.55):.4%}")
@@ -19,27 +19,28 @@ Let's see how much chance a player has (of equal skill) to win only by making th
 
 import random
 import numpy as np
-import matplotlib.pyplot as plt
 
-def match() -> bool:
+def match(p_serve: float = 0.55, target: int = 11, win_by: int = 2) -> bool:
     #Player 1 is the player who starts serving.
+    if not 0 < p_serve <= 1:
+        raise ValueError("p_serve must be greater than 0 and at most 1 (at 0 the match never ends)")
     pointsOfPlayer1 = 0
     pointsOfPlayer2 = 0
 
     currentServer = True # True for Player 1, False for Player 2
 
-    # Simulate a match until one player reaches 11 points
+    # Simulate a match until one player reaches 11 points with at least 2 points difference
 
-    while (pointsOfPlayer1 < 11 and pointsOfPlayer2 < 11) and (abs(pointsOfPlayer1 - pointsOfPlayer2) < 2):
+    while (pointsOfPlayer1 < target and pointsOfPlayer2 < target) or (abs(pointsOfPlayer1 - pointsOfPlayer2) < win_by):
         # Simulate a point
         if currentServer:  # Player 1 is serving
-            if random.random() < 0.55:  # Server wins the point
+            if random.random() < p_serve:  # Server wins the point
                 pointsOfPlayer1 += 1
             else:  # Receiver wins the point
                 pointsOfPlayer2 += 1
                 currentServer = False  # Switch server
         else:
-            if random.random() < 0.55:  # Server wins the point
+            if random.random() < p_serve:  # Server wins the point
                 pointsOfPlayer2 += 1
             else:  # Receiver wins the point
                 pointsOfPlayer1 += 1
@@ -61,29 +62,37 @@ def win_ratios_over_time(num_rounds: int) -> np.ndarray:
 
     return ratios
 
+def plot_win_ratios(ratios: np.ndarray, filename: str = "SquashServe.png", plot_limit: int = 10000) -> None:
+    #For this, you will have to install matplotlib if you haven't already.
+    import matplotlib.pyplot as plt  # Only loaded when we actually make a plot
+    from Plotting import downsample, min_max_envelope  # At most a few thousand points are drawn, whatever plot_limit is
+
+    plot_limit = min(plot_limit, len(ratios))
+    # Plot how the ratio changes by increasing $n$  
+
+    x = np.arange(1, plot_limit + 1)
+    y = ratios[:plot_limit]
+    envelope_x, lowest, highest = min_max_envelope(x, y)
+    x, y = downsample(x, y)
+
+    plt.title("Win ratio for the player who serves first in a squash match")
+    plt.xlabel("n = number of rounds played")
+    plt.ylabel("Cumulative win percentage")
+    plt.axhline(y=0.55, linestyle="--", alpha=0.6, label="Theoretical 55% win rate")
+    plt.axhline(y=0.50, linestyle="--", alpha=0.3, color="gray", label="50% win rate")
+    plt.fill_between(envelope_x, lowest, highest, alpha=0.3)
+    plt.plot(x, y)
+    plt.xlim(1, plot_limit)
+    plt.ylim(0.1, 0.6)
+    plt.legend()
+    plt.savefig(filename, dpi=200)
+    #plt.show()
+
 if __name__ == "__main__":
     num_simulations = 10_000
-    win_rate = win_ratios_over_time(num_simulations)[-1]
+    ratios = win_ratios_over_time(num_simulations)
+    win_rate = ratios[-1]
     print(f"Starters win rate: {win_rate:.2%}")
 
-# More than looking at the number, let's make some plots to visualize the results!
-#For this, you will have to install numpy and matplotlib if you haven't already.
-
-ratios = win_ratios_over_time(num_simulations)
-plot_limit = 10000
-# Plot how the ratio changes by increasing $n$  
-
-x = np.arange(1, plot_limit + 1)
-y = ratios[:plot_limit]
-
-plt.title("Win ratio for the player who serves first in a squash match")
-plt.xlabel("n = number of rounds played")
-plt.ylabel("Cumulative win percentage")
-plt.axhline(y=0.55, linestyle="--", alpha=0.6, label="Theoretical 55% win rate")
-plt.axhline(y=0.50, linestyle="--", alpha=0.3, color="gray", label="50% win rate")
-plt.plot(x, y)
-plt.xlim(1, plot_limit)
-plt.ylim(0.1, 0.6)
-plt.legend()
-plt.savefig("SquashServe.png", dpi=200)
-#plt.show()
+    # More than looking at the number, let's make some plots to visualize the results!
+    plot_win_ratios(ratios)
@@ -0,0 +1,224 @@
+"""
+Streaming_Stats in a Nutshell
+
+win_ratios_over_time keeps the win ratio after every single round, just to read the last one at the end
+(10^10 rounds would need 80 GB), and we have to guess the number of rounds (10,000) before we start.
+
+Here we only keep what we need:
+1. the counts (wins and rounds, or how often each marking was the last one for the ladybug),
+2. a Wilson confidence interval computed from those counts, and
+3. a handful of checkpoints (rounds, wins), spaced evenly on a log scale, for the convergence plots.
+
+run_until plays batches of rounds (growing batch sizes) until the confidence interval is as narrow as we asked for,
+so we stop as soon as the answer is precise enough instead of after a fixed number of rounds.
+PairAccumulator and DifferenceAccumulator take the counts of the variance reduced jobs of Variance_Reduction.py,
+so their (narrower) confidence intervals stop run_until earlier.
+"""
+
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+def z_value(confidence: float) -> float:
+    # 1.96 for a 95% confidence interval
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be strictly between 0 and 1")
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes, trials, confidence: float = 0.95):
+    # Wilson score interval of a success ratio (works with NumPy arrays of successes too)
+    z = z_value(confidence)
+    trials = np.asarray(trials, dtype=float)
+    ratio = np.asarray(successes, dtype=float) / trials
+    denominator = 1 + z * z / trials
+    center = (ratio + z * z / (2 * trials)) / denominator
+    half_width = z / denominator * np.sqrt(ratio * (1 - ratio) / trials + z * z / (4 * trials * trials))
+    # Clipped to [0, 1]: with 0 or all successes, rounding would otherwise leave the bound a hair outside
+    return np.clip(center - half_width, 0, 1), np.clip(center + half_width, 0, 1)
+
+
+class WinRateAccumulator:
+    # Wins out of rounds, with log-spaced checkpoints for convergence plots.
+
+    def __init__(self, confidence: float = 0.95, checkpoints_per_decade: int = 20):
+        self.confidence = confidence
+        self.checkpoint_step = 10 ** (1 / checkpoints_per_decade)
+        self.wins = 0
+        self.rounds = 0
+        self.checkpoints = []  # (rounds, wins)
+        self._next_checkpoint = 1
+
+    def update(self, wins: int, rounds: int) -> None:
+        self.wins += int(wins)
+        self.rounds += int(rounds)
+        if self.rounds >= self._next_checkpoint:
+            self.checkpoints.append((self.rounds, self.wins))
+            self._next_checkpoint = max(self.rounds + 1, math.ceil(self.rounds * self.checkpoint_step))
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.rounds if self.rounds else math.nan
+
+    def interval(self) -> tuple[float, float]:
+        if not self.rounds:
+            return 0.0, 1.0
+        low, high = wilson_interval(self.wins, self.rounds, self.confidence)
+        return float(low), float(high)
+
+    def half_width(self) -> float:
+        low, high = self.interval()
+        return (high - low) / 2
+
+    def checkpoint_series(self) -> tuple[np.ndarray, np.ndarray]:
+        # Rounds played and cumulative win ratio at every checkpoint (and at the current state)
+        points = self.checkpoints if self.checkpoints and self.checkpoints[-1][0] == self.rounds else self.checkpoints + [(self.rounds, self.wins)]
+        rounds = np.array([n for n, _ in points], dtype=np.int64)
+        wins = np.array([w for _, w in points], dtype=np.int64)
+        return rounds, wins / np.maximum(rounds, 1)
+
+
+class CategoryAccumulator:
+    # How often each category came up (e.g. which marking was the last one), with log-spaced checkpoints.
+
+    def __init__(self, n_categories: int, confidence: float = 0.95, checkpoints_per_decade: int = 20):
+        self.confidence = confidence
+        self.checkpoint_step = 10 ** (1 / checkpoints_per_decade)
+        self.counts = np.zeros(n_categories, dtype=np.int64)
+        self.rounds = 0
+        self.checkpoints = []  # (rounds, counts)
+        self._next_checkpoint = 1
+
+    def update(self, counts: np.ndarray, rounds: int | None = None) -> None:
+        counts = np.asarray(counts, dtype=np.int64)
+        self.counts += counts
+        self.rounds += int(counts.sum()) if rounds is None else int(rounds)
+        if self.rounds >= self._next_checkpoint:
+            self.checkpoints.append((self.rounds, self.counts.copy()))
+            self._next_checkpoint = max(self.rounds + 1, math.ceil(self.rounds * self.checkpoint_step))
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        return self.counts / max(self.rounds, 1)
+
+    def interval(self) -> tuple[np.ndarray, np.ndarray]:
+        if not self.rounds:
+            return np.zeros(self.counts.size), np.ones(self.counts.size)
+        return wilson_interval(self.counts, self.rounds, self.confidence)
+
+    def half_width(self) -> float:
+        # The widest confidence interval of all categories
+        low, high = self.interval()
+        return float(np.max(high - low) / 2)
+
+
+class PairAccumulator(CategoryAccumulator):
+    # Like CategoryAccumulator, for rounds played in pairs (round i and round i + n // 2 of every batch, e.g. antithetic pairs).
+    # The counts of a batch are the hits of each category followed by the number of pairs in which both rounds hit it,
+    # so the confidence interval comes from the variance of the pair averages (and shrinks if the pairs are negatively correlated).
+    # An odd batch leaves one round without a partner, which we simply count as half a pair.
+
+    def __init__(self, n_categories: int = 1, confidence: float = 0.95, checkpoints_per_decade: int = 20):
+        super().__init__(n_categories, confidence, checkpoints_per_decade)
+        self.both = np.zeros(n_categories, dtype=np.int64)
+
+    def update(self, counts: np.ndarray, rounds: int | None = None) -> None:
+        counts = np.asarray(counts, dtype=np.int64)
+        hits, both = counts[: self.counts.size], counts[self.counts.size :]
+        self.both += both
+        super().update(hits, int(hits.sum()) if rounds is None else rounds)
+
+    @property
+    def win_rate(self) -> float:
+        return float(self.frequencies[0]) if self.rounds else math.nan
+
+    def standard_error(self) -> np.ndarray:
+        # Standard error of the frequencies, from the averages of the pairs: 1 if both rounds hit, 1/2 if one did, 0 if none
+        pairs = self.rounds / 2
+        if pairs <= 1:
+            return np.full(self.counts.size, np.inf)
+        mean = self.counts / self.rounds
+        mean_square = (self.both + (self.counts - 2 * self.both) / 4) / pairs
+        return np.sqrt(np.maximum(mean_square - mean * mean, 0) / (pairs - 1))
+
+    def interval(self) -> tuple[np.ndarray, np.ndarray]:
+        if not self.rounds:
+            return np.zeros(self.counts.size), np.ones(self.counts.size)
+        half_width = z_value(self.confidence) * self.standard_error()
+        return np.clip(self.frequencies - half_width, 0, 1), np.clip(self.frequencies + half_width, 0, 1)
+
+
+class DifferenceAccumulator(CategoryAccumulator):
+    # Difference of two win rates b - a, where round i of variant a and round i of variant b form a pair
+    # (with common random numbers they play the same random numbers). The counts of a batch are
+    # (wins of a, wins of b, pairs where exactly one of the two won), enough for the variance of the difference of each pair.
+    # The counts do not add up to the rounds, so update always needs the number of rounds.
+
+    def __init__(self, confidence: float = 0.95, checkpoints_per_decade: int = 20):
+        super().__init__(3, confidence, checkpoints_per_decade)
+
+    @property
+    def difference(self) -> float:
+        return (self.counts[1] - self.counts[0]) / self.rounds if self.rounds else math.nan
+
+    def standard_error(self) -> float:
+        if self.rounds <= 1:
+            return math.inf
+        difference = self.difference
+        return math.sqrt(max(self.counts[2] / self.rounds - difference * difference, 0) / (self.rounds - 1))
+
+    def interval(self) -> tuple[float, float]:
+        if not self.rounds:
+            return -1.0, 1.0
+        half_width = z_value(self.confidence) * self.standard_error()
+        return max(self.difference - half_width, -1.0), min(self.difference + half_width, 1.0)
+
+    def half_width(self) -> float:
+        low, high = self.interval()
+        return (high - low) / 2
+
+
+def run_until(accumulator, job, half_width: float, max_rounds: int, rng: np.random.Generator | None = None, first_batch: int = 1_000, max_batch: int = 2**20):
+    # Plays batches of job(n_rounds, rng=rng) (same jobs as in Parallel_Runner) until the confidence interval half width
+    # is at most `half_width`, or max_rounds rounds are played. Batches double in size, so the checkpoints stay log-spaced.
+    if rng is None:
+        rng = np.random.default_rng()
+    batch = first_batch
+    while accumulator.rounds < max_rounds:
+        size = min(batch, max_rounds - accumulator.rounds)
+        accumulator.update(job(size, rng=rng), size)
+        if accumulator.half_width() <= half_width:
+            break
+        batch = min(2 * batch, max_batch)
+    return accumulator
+
+
+def stream_game(game, half_width: float, max_rounds: int, confidence: float = 0.95, check_every: int = 1_000) -> WinRateAccumulator:
+    # The same for the pure Python games (like monty_hall_game or match), one round per call of game().
+    accumulator = WinRateAccumulator(confidence)
+    while accumulator.rounds < max_rounds:
+        size = min(check_every, max_rounds - accumulator.rounds)
+        wins = 0
+        for _ in range(size):
+            if game():
+                wins += 1
+        accumulator.update(wins, size)
+        if accumulator.half_width() <= half_width:
+            break
+    return accumulator
+
+
+if __name__ == "__main__":
+    from functools import partial
+
+    import LadyBug_Jump
+    import Monty_Hall_Batch
+    import Squash_Batch
+
+    switching = run_until(WinRateAccumulator(), partial(Monty_Hall_Batch.count_wins, n_doors=3, switch=True), 0.0005, 10**9)
+    print(f"Switching win rate: {switching.win_rate:.3%} +/- {switching.half_width():.3%} after {switching.rounds} games")
+    squash = run_until(WinRateAccumulator(), partial(Squash_Batch.count_wins, p_serve=0.55), 0.001, 10**9)
+    print(f"Starters win rate: {squash.win_rate:.3%} +/- {squash.half_width():.3%} after {squash.rounds} matches")
+    ladybug = run_until(CategoryAccumulator(12), partial(LadyBug_Jump.last_marking_counts, n_markings=12), 0.001, 10**9)
+    print(f"LadyBug: every marking within +/- {ladybug.half_width():.3%} after {ladybug.rounds} rounds: {np.round(ladybug.frequencies[1:], 4)}")
@@ -0,0 +1,257 @@
+"""
+Variance_Reduction in a Nutshell
+
+The same answer with fewer rounds, by choosing cleverly which random numbers the rounds use.
+
+1. Common random numbers ("common"): when we compare strategies or rules, let them play the very same games.
+   In Monty Hall one set of games answers both questions at once (instead of two independent runs). That halves the games,
+   but does not measure the difference between switching and sticking more precisely: a game won by sticking is lost by switching,
+   so the two are negatively correlated, and the effective sample size of the difference shows it. In squash, two rule variants (say serve probability 0.55 vs 0.60) see the same random
+   number in every rally of every match, so the difference between them is measured much more precisely.
+2. Antithetic variates ("antithetic"): every round that uses the random numbers u gets a partner round that uses 1 - u.
+   If the ladybug goes clockwise, its partner goes counter-clockwise; if a server wins a rally, the partner's server probably loses it.
+   The two results are negatively correlated, so their average varies less than the average of two independent rounds.
+   (Not always: a fair ladybug and its partner are mirror images, so both end on the marking opposite the start together,
+   and that one marking gets a worse estimate. The effective sample size shows it.)
+
+Every estimate reports its effective sample size: the number of independent rounds that would give the same standard error.
+More effective rounds than simulated rounds means the trick paid off.
+
+The count_* functions are jobs in the format of Parallel_Runner (job(n_rounds, rng=rng) returning counts) with a mode,
+so variance reduced rounds can be spread over all CPU cores, or played by Streaming_Stats.run_until into a PairAccumulator
+(antithetic pairs) or DifferenceAccumulator (common random numbers), which stops as soon as their narrower interval is narrow enough:
+
+    run_until(PairAccumulator(), partial(count_squash, mode="antithetic", p_serve=0.55), 0.001, 10**9)
+
+The squash jobs play CHUNK_SIZE matches at a time and only keep the shared draws of the current block of rallies,
+so their memory does not grow with the number of matches.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+import LadyBug_Jump
+import Monty_Hall_Batch
+import Squash_Batch
+from Streaming_Stats import DifferenceAccumulator, PairAccumulator
+
+MODES = ("none", "common", "antithetic")
+CHUNK_SIZE = 2**16  # Matches per chunk of the squash jobs: a block of shared draws is CHUNK_SIZE x 64 float32 (16 MB)
+
+class Estimate(NamedTuple):
+    value: float | np.ndarray
+    standard_error: float | np.ndarray
+    rounds: int  # Rounds (games, matches) actually simulated for this estimate
+    effective_sample_size: float | np.ndarray  # Independent rounds needed for the same standard error
+
+
+def _binary_estimate(wins: int, rounds: int) -> Estimate:
+    # Ratio of wins out of independent rounds
+    value = wins / rounds
+    variance = value * (1 - value) / rounds
+    return Estimate(value, float(np.sqrt(variance)), rounds, _effective_sample_size(value * (1 - value), variance))
+
+
+def _effective_sample_size(single_round_variance, estimator_variance):
+    # Independent rounds needed for the same variance: sigma^2 / Var(estimate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(estimator_variance > 0, single_round_variance / estimator_variance, np.inf)[()]
+
+
+class SharedDraws:
+    # Random numbers for every (match, rally), the same for every simulation using the same seed.
+    # With antithetic=True, match i + n_matches // 2 uses 1 - u where match i uses u (an odd last match has no partner).
+    # The numbers come in blocks of `block` rallies, and block b is drawn from its own stream (child b of SeedSequence(seed)),
+    # so we only keep the block of the current rally: a simulation starting again at rally 1 just draws block 0 again.
+
+    def __init__(self, n_matches: int, seed: int, antithetic: bool = False, block: int = 64):
+        self.n_pairs = n_matches // 2 if antithetic else 0
+        self.n_rows = n_matches - self.n_pairs
+        self.seed = seed
+        self.block = block
+        self._current = (-1, None)
+
+    def _block(self, block: int) -> np.ndarray:
+        if self._current[0] != block:
+            self._current = (None, None)  # Drop the old block before drawing the new one
+            rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(block,)))
+            self._current = (block, rng.random((self.n_rows, self.block), dtype=np.float32))
+        return self._current[1]
+
+    def __call__(self, index: np.ndarray, rally: int) -> np.ndarray:
+        block, column = divmod(rally - 1, self.block)
+        uniforms = self._block(block)
+        if not self.n_pairs:
+            return uniforms[index, column]
+        mirrored = (index >= self.n_pairs) & (index < 2 * self.n_pairs)
+        uniform = uniforms[index - self.n_pairs * (index >= self.n_pairs), column]
+        return np.where(mirrored, 1 - uniform, uniform)
+
+
+def _chunks(n_rounds: int, chunk_size: int, rng: np.random.Generator):
+    # (size, seed) of every chunk; the seeds come from rng, so a job is reproducible from its rng like every other job.
+    for start in range(0, n_rounds, chunk_size):
+        yield min(chunk_size, n_rounds - start), int(rng.integers(2**63))
+
+
+def _both(hits: np.ndarray) -> np.ndarray:
+    # Number of pairs (round i, round i + n // 2) in which both rounds hit, for a bool array of rounds (or rounds x categories)
+    half = hits.shape[0] // 2
+    return np.count_nonzero(hits[:half] & hits[half : 2 * half], axis=0)
+
+
+# ---- Jobs: job(n_rounds, rng=rng) returning counts, for Parallel_Runner and Streaming_Stats.run_until ----
+
+def count_monty_hall(n_games: int, n_doors: int = 3, n_revealed: int | None = None, mode: str = "common", rng: np.random.Generator | None = None,
+                     chunk_size: int = Monty_Hall_Batch.DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    # (sticking wins, switching wins, pairs of games won by exactly one of them) for a DifferenceAccumulator (switching - sticking).
+    # "common": game i is played with both strategies, "none": game i of two independent runs of n_games each.
+    if mode not in ("none", "common"):
+        raise ValueError("Monty Hall supports the modes 'none' and 'common'")
+    if rng is None:
+        rng = np.random.default_rng()
+    counts = np.zeros(3, dtype=np.int64)
+    for start in range(0, n_games, chunk_size):
+        size = min(chunk_size, n_games - start)
+        if mode == "common":
+            switch_wins, stick_wins = Monty_Hall_Batch.play_both(size, n_doors, n_revealed, rng)
+        else:
+            switch_wins = Monty_Hall_Batch.play_batch(size, n_doors, n_revealed, True, rng)
+            stick_wins = Monty_Hall_Batch.play_batch(size, n_doors, n_revealed, False, rng)
+        counts += np.count_nonzero(stick_wins), np.count_nonzero(switch_wins), np.count_nonzero(stick_wins != switch_wins)
+    return counts
+
+
+def count_squash(n_matches: int, mode: str = "antithetic", rng: np.random.Generator | None = None, chunk_size: int = CHUNK_SIZE, **rules) -> np.ndarray:
+    # (wins of the first server, pairs of matches both won) for a PairAccumulator; rules as in Squash_Batch.play_batch.
+    # "antithetic": the matches of every pair play u and 1 - u, "none": independent matches.
+    if mode not in ("none", "antithetic"):
+        raise ValueError("a single squash estimate supports the modes 'none' and 'antithetic' (use count_squash_difference for 'common')")
+    if rng is None:
+        rng = np.random.default_rng()
+    counts = np.zeros(2, dtype=np.int64)
+    for size, seed in _chunks(n_matches, chunk_size, rng):
+        if mode == "antithetic":
+            wins = Squash_Batch.play_batch(size, draws=SharedDraws(size, seed, antithetic=True), **rules).player1_wins
+        else:
+            wins = Squash_Batch.play_batch(size, rng=np.random.default_rng(seed), **rules).player1_wins
+        counts += np.count_nonzero(wins), _both(wins)
+    return counts
+
+
+def count_squash_difference(n_matches: int, rules_a: dict, rules_b: dict, mode: str = "common", rng: np.random.Generator | None = None,
+                            chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    # (wins with rules a, wins with rules b, matches won with exactly one of them) for a DifferenceAccumulator.
+    # "common": match i of both variants plays the same random numbers, "none": independent matches.
+    if mode not in ("none", "common"):
+        raise ValueError("a squash comparison supports the modes 'none' and 'common'")
+    if rng is None:
+        rng = np.random.default_rng()
+    counts = np.zeros(3, dtype=np.int64)
+    for size, seed in _chunks(n_matches, chunk_size, rng):
+        if mode == "common":
+            draws = SharedDraws(size, seed)
+            wins_a = Squash_Batch.play_batch(size, draws=draws, **rules_a).player1_wins
+            wins_b = Squash_Batch.play_batch(size, draws=draws, **rules_b).player1_wins
+        else:
+            chunk_rng = np.random.default_rng(seed)
+            wins_a = Squash_Batch.play_batch(size, rng=chunk_rng, **rules_a).player1_wins
+            wins_b = Squash_Batch.play_batch(size, rng=chunk_rng, **rules_b).player1_wins
+        counts += np.count_nonzero(wins_a), np.count_nonzero(wins_b), np.count_nonzero(wins_a != wins_b)
+    return counts
+
+
+def count_ladybug(n_rounds: int, n_markings: int = 12, p_clockwise: float = 0.5, mode: str = "antithetic", rng: np.random.Generator | None = None,
+                  chunk_size: int = LadyBug_Jump.DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    # How often each marking was the last one, followed by the pairs of rounds that both ended on it, for a PairAccumulator(n_markings).
+    if mode not in ("none", "antithetic"):
+        raise ValueError("LadyBug supports the modes 'none' and 'antithetic'")
+    if rng is None:
+        rng = np.random.default_rng()
+    counts = np.zeros(2 * n_markings, dtype=np.int64)
+    for start in range(0, n_rounds, chunk_size):
+        size = min(chunk_size, n_rounds - start)
+        last = LadyBug_Jump.jump_round_the_clock(size, n_markings, p_clockwise, rng, antithetic=mode == "antithetic")
+        counts += np.concatenate((np.bincount(last, minlength=n_markings), _both(last[:, None] == np.arange(n_markings))))
+    return counts
+
+
+# ---- Estimates ----
+
+def _pair_estimate(accumulator: PairAccumulator) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Frequencies, their standard errors and effective sample sizes
+    value = accumulator.frequencies
+    standard_error = accumulator.standard_error()
+    return value, standard_error, _effective_sample_size(value * (1 - value), standard_error**2)
+
+
+def _difference_estimate(accumulator: DifferenceAccumulator, rounds: int) -> Estimate:
+    # b - a; the effective sample size counts pairs of independent rounds (one with each variant).
+    p_a, p_b = accumulator.frequencies[:2]
+    standard_error = accumulator.standard_error()
+    single_pair_variance = p_a * (1 - p_a) + p_b * (1 - p_b)
+    return Estimate(float(accumulator.difference), standard_error, rounds, float(_effective_sample_size(single_pair_variance, standard_error**2)))
+
+
+def monty_hall(n_games: int, n_doors: int = 3, n_revealed: int | None = None, mode: str = "common", rng: np.random.Generator | None = None) -> dict:
+    # Switching and sticking win rates and their difference. "common": one set of games for both, "none": two independent runs of n_games.
+    # effective_games: independent games (half of them switching) that would measure the difference as precisely.
+    accumulator = DifferenceAccumulator()
+    accumulator.update(count_monty_hall(n_games, n_doors, n_revealed, mode, rng), n_games)
+    stick_wins, switch_wins, _ = accumulator.counts
+    simulated = n_games if mode == "common" else 2 * n_games
+    difference = _difference_estimate(accumulator, simulated)
+    return {"switch": _binary_estimate(int(switch_wins), n_games), "stick": _binary_estimate(int(stick_wins), n_games), "difference": difference,
+            "games_simulated": simulated, "effective_games": 2 * difference.effective_sample_size}
+
+
+def squash(n_matches: int, mode: str = "antithetic", rng: np.random.Generator | None = None, **rules) -> Estimate:
+    # Win rate of the first server (rules as in Squash_Batch.play_batch), with antithetic pairs of matches or plain.
+    n_matches += n_matches % 2
+    accumulator = PairAccumulator()
+    accumulator.update(count_squash(n_matches, mode, rng, **rules), n_matches)
+    value, standard_error, effective_sample_size = _pair_estimate(accumulator)
+    return Estimate(float(value[0]), float(standard_error[0]), n_matches, float(effective_sample_size[0]))
+
+
+def squash_difference(n_matches: int, rules_a: dict, rules_b: dict, mode: str = "common", rng: np.random.Generator | None = None) -> Estimate:
+    # Difference of the first server's win rate between two rule variants (b - a), with common random numbers or independent runs.
+    # The effective sample size counts pairs of independent matches (one with each variant).
+    accumulator = DifferenceAccumulator()
+    accumulator.update(count_squash_difference(n_matches, rules_a, rules_b, mode, rng), n_matches)
+    return _difference_estimate(accumulator, 2 * n_matches)
+
+
+def ladybug(n_rounds: int, n_markings: int = 12, p_clockwise: float = 0.5, mode: str = "antithetic", rng: np.random.Generator | None = None) -> Estimate:
+    # Chance of every marking being the last one, with antithetic pairs of rounds or plain.
+    n_rounds += n_rounds % 2
+    accumulator = PairAccumulator(n_markings)
+    accumulator.update(count_ladybug(n_rounds, n_markings, p_clockwise, mode, rng), n_rounds)
+    value, standard_error, effective_sample_size = _pair_estimate(accumulator)
+    return Estimate(value, standard_error, n_rounds, effective_sample_size)
+
+
+if __name__ == "__main__":
+    from functools import partial
+
+    from Streaming_Stats import run_until
+
+    for n_doors, n_revealed in ((3, None), (10, 3)):
+        for mode in ("none", "common"):
+            result = monty_hall(1_000_000, n_doors, n_revealed, mode=mode, rng=np.random.default_rng(1))
+            print(f"Monty Hall, {n_doors} doors ({mode}): switching {result['switch'].value:.3%}, sticking {result['stick'].value:.3%}, "
+                  f"difference {result['difference'].value:.3%} +/- {result['difference'].standard_error:.3%}, "
+                  f"{result['games_simulated']} games simulated, worth {result['effective_games']:.0f} independent games")
+    for mode in ("none", "antithetic"):
+        estimate = squash(200_000, mode=mode, rng=np.random.default_rng(1))
+        print(f"Squash ({mode}): {estimate.value:.3%} +/- {estimate.standard_error:.3%}, effective matches {estimate.effective_sample_size:.0f} of {estimate.rounds}")
+    for mode in ("none", "common"):
+        estimate = squash_difference(200_000, {"p_serve": 0.55}, {"p_serve": 0.60}, mode=mode, rng=np.random.default_rng(1))
+        print(f"Squash 0.60 vs 0.55 ({mode}): {estimate.value:+.3%} +/- {estimate.standard_error:.3%}, effective match pairs {estimate.effective_sample_size:.0f} of {estimate.rounds // 2}")
+    for mode in ("none", "antithetic"):
+        estimate = ladybug(200_000, mode=mode)
+        print(f"LadyBug ({mode}): effective rounds per marking {np.round(estimate.effective_sample_size[1:]).astype(int)} of {estimate.rounds}")
+    for mode in ("none", "antithetic"):
+        accumulator = run_until(PairAccumulator(), partial(count_squash, mode=mode, p_serve=0.55), 0.001, 10**8, np.random.default_rng(1))
+        print(f"Squash ({mode}) until +/- 0.1%: {accumulator.win_rate:.3%} after {accumulator.rounds} matches")
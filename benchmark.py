@@ -0,0 +1,233 @@
+"""
+benchmark in a Nutshell
+
+How fast is each game with each engine? For every game at several sizes
+    Monty Hall with 3, 52 and 1000 doors, LadyBug with 12, 120 and 1200 markings, squash with serve probabilities 0.5 .. 0.7
+and every engine that can play it
+    python (the original scripts), bits (the pure Python LadyBug with a bit stream), vectorized (the NumPy batch engines), parallel (Parallel_Runner), exact (the solvers)
+we measure
+1. rounds per second (for the exact solvers: solves per second, with cold caches),
+2. the peak memory (RSS) of the process, and
+3. the statistical error reached per CPU-second: the standard error of the estimate times sqrt(CPU seconds),
+   i.e. the error you would get from one CPU-second of simulation (lower is better, 0 for the exact solvers).
+
+Every case runs in a fresh Python process (so the memory numbers don't mix), doubling the number of rounds until it runs for at least --min-seconds.
+The results are written as JSON. With --baseline, the results are compared to a stored run and the script fails
+if any case got slower than --threshold (20% by default), so a slowdown can be caught in review:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+CASES = (
+    [("monty_hall", n_doors, engine) for n_doors in (3, 52, 1000) for engine in ("python", "vectorized", "parallel", "exact")]
+    + [("ladybug", 12, "python")] + [("ladybug", n_markings, "bits") for n_markings in (12, 120, 1200)]
+    + [("ladybug", n_markings, engine) for n_markings in (12, 120, 1200) for engine in ("vectorized", "parallel", "exact")]
+    + [("squash", p_serve, engine) for p_serve in (0.5, 0.55, 0.6, 0.7) for engine in ("python", "vectorized", "parallel", "exact")]
+)
+DEFAULT_THRESHOLD = 0.2
+
+def _python_monty_hall(n_doors: int):
+    if n_doors == 3:
+        from Monty_Hall_Problem import monty_hall_game
+    elif n_doors == 52:
+        from Monty_Hall_Problem_FrenchCards import monty_hall_game
+    elif n_doors == 1000:
+        from Monty_Hall_Problem_1000Doors import monty_hall_game
+    else:
+        raise ValueError(f"there is no pure Python Monty Hall game with {n_doors} doors")
+    return monty_hall_game
+
+
+def _job(game: str, size):
+    # The count function of the vectorized engine, in the job format of Parallel_Runner
+    from functools import partial
+    if game == "monty_hall":
+        import Monty_Hall_Batch
+        return partial(Monty_Hall_Batch.count_wins, n_doors=size, switch=True)
+    if game == "squash":
+        import Squash_Batch
+        return partial(Squash_Batch.count_wins, p_serve=size)
+    import LadyBug_Jump
+    return partial(LadyBug_Jump.last_marking_counts, n_markings=size)
+
+
+def play(game: str, size, engine: str, rounds: int, seed: int = 2024) -> np.ndarray | None:
+    # Plays `rounds` rounds and returns the counts (wins and rounds, or the last marking counts). None for the exact solvers.
+    if engine == "python":
+        random.seed(seed)
+        if game == "monty_hall":
+            monty_hall_game = _python_monty_hall(size)
+            return np.array([sum(monty_hall_game(True) for _ in range(rounds)), rounds])
+        if game == "squash":
+            from Squash_Serve import match
+            return np.array([sum(match(size) for _ in range(rounds)), rounds])
+        if size != 12:
+            raise ValueError("the pure Python LadyBug only has 12 markings")
+        from LadyBug import one_full_round_the_clock
+        return np.bincount([one_full_round_the_clock() % 12 for _ in range(rounds)], minlength=12)
+    if engine == "bits":
+        if game != "ladybug":
+            raise ValueError("the bit-stream engine only exists for the ladybug")
+        random.seed(seed)
+        from LadyBug import one_full_round_the_clock_fast
+        return np.bincount([one_full_round_the_clock_fast(n_markings=size) for _ in range(rounds)], minlength=size)
+    if engine == "vectorized":
+        counts = np.atleast_1d(_job(game, size)(rounds, rng=np.random.default_rng(seed)))
+        return counts if game == "ladybug" else np.array([counts[0], rounds])
+    if engine == "parallel":
+        from Parallel_Runner import DEFAULT_CHUNK_SIZE, run_parallel
+        workers = os.cpu_count() or 1
+        chunk_size = max(1, min(DEFAULT_CHUNK_SIZE, math.ceil(rounds / (4 * workers))))
+        counts = run_parallel(_job(game, size), rounds, seed, workers, chunk_size)
+        return counts if game == "ladybug" else np.array([counts[0], rounds])
+    if engine == "exact":
+        for _ in range(rounds):
+            if game == "squash":
+                import Squash_Exact
+                Squash_Exact._reach_polynomials.cache_clear()
+                Squash_Exact.win_probability(size)
+            elif game == "monty_hall":
+                import Monty_Hall_Exact
+                Monty_Hall_Exact._solve.cache_clear()
+                Monty_Hall_Exact.switch_and_stick(size)
+            elif game == "ladybug":
+                import LadyBug_Exact
+                LadyBug_Exact._solve.cache_clear()
+                LadyBug_Exact._transition_table.cache_clear()
+                LadyBug_Exact.last_marking_distribution(size)
+            else:
+                raise ValueError(f"no exact solver for {game}")
+        return None
+    raise ValueError(f"unknown engine {engine}")
+
+
+def standard_error(counts: np.ndarray | None, game: str) -> float:
+    # Standard error of the estimate (the largest one of all markings for the ladybug).
+    # The ratios are estimated as (count + 1) / (rounds + 2), so a short run with only wins (or none) still has an error above 0,
+    # and only the exact solvers report 0.
+    if counts is None:
+        return 0.0
+    if game == "ladybug":
+        rounds = counts.sum()
+        ratios = (counts + 1) / (rounds + 2)
+    else:
+        rounds = counts[1]
+        ratios = np.array([(counts[0] + 1) / (rounds + 2)])
+    return float(np.max(np.sqrt(ratios * (1 - ratios) / rounds)))
+
+
+def measure(game: str, size, engine: str, min_seconds: float) -> dict:
+    # Doubles the number of rounds until one run takes at least min_seconds (in this process).
+    rounds = 1
+    while True:
+        cpu_start = time.process_time() + _children_cpu()
+        start = time.perf_counter()
+        counts = play(game, size, engine, rounds)
+        seconds = time.perf_counter() - start
+        cpu_seconds = time.process_time() + _children_cpu() - cpu_start
+        if seconds >= min_seconds:
+            break
+        rounds *= 2 if seconds > min_seconds / 16 else 8
+    error = standard_error(counts, game)
+    return {
+        "game": game,
+        "size": size,
+        "engine": engine,
+        "rounds": rounds,
+        "seconds": seconds,
+        "cpu_seconds": cpu_seconds,
+        "rounds_per_second": rounds / seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "standard_error": error,
+        "error_per_cpu_second": error * math.sqrt(cpu_seconds),
+    }
+
+
+def _children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * scale / 2**20
+
+
+def run_case_in_subprocess(game: str, size, engine: str, min_seconds: float) -> dict:
+    case = json.dumps({"game": game, "size": size, "engine": engine, "min_seconds": min_seconds})
+    output = subprocess.run([sys.executable, __file__, "--case", case], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    # Cases whose rounds per second dropped by more than `threshold` compared to the baseline
+    previous = {(case["game"], case["size"], case["engine"]): case for case in baseline}
+    regressions = []
+    for case in results:
+        old = previous.get((case["game"], case["size"], case["engine"]))
+        if old is None:
+            continue
+        change = case["rounds_per_second"] / old["rounds_per_second"] - 1
+        if change < -threshold:
+            regressions.append(f"{case['game']} {case['size']} {case['engine']}: {old['rounds_per_second']:.4g} -> {case['rounds_per_second']:.4g} rounds/s ({change:+.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every game with every engine.")
+    parser.add_argument("--output", help="write the results as JSON to this file (default: print them)")
+    parser.add_argument("--baseline", help="compare against the results stored in this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="minimum duration of a measured run")
+    parser.add_argument("--game", action="append", help="only benchmark these games")
+    parser.add_argument("--engine", action="append", help="only benchmark these engines")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        case = json.loads(args.case)
+        print(json.dumps(measure(case["game"], case["size"], case["engine"], case["min_seconds"])))
+        return 0
+
+    results = []
+    for game, size, engine in CASES:
+        if (args.game and game not in args.game) or (args.engine and engine not in args.engine):
+            continue
+        result = run_case_in_subprocess(game, size, engine, args.min_seconds)
+        results.append(result)
+        print(f"{game:10s} {size!s:>5s} {engine:10s} {result['rounds_per_second']:12.4g} rounds/s  {result['peak_rss_mb']:7.1f} MB  error/cpu-s {result['error_per_cpu_second']:.3g}", file=sys.stderr)
+
+    report = {"python": platform.python_version(), "numpy": np.__version__, "cpu_count": os.cpu_count(), "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+check_import_time in a Nutshell
+
+We start many short-lived worker processes, and every one of them imports the games.
+So importing a game has to be cheap: no simulation, no plotting, and no matplotlib (which alone takes hundreds of milliseconds).
+
+This script imports every module in a fresh Python interpreter, measures how long the import takes (best of a few tries),
+checks that matplotlib was not loaded, and fails if a module goes over the budget.
+
+    python check_import_time.py              # default budget
+    python check_import_time.py --budget-ms 150
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = [
+    "Monty_Hall_Problem",
+    "Monty_Hall_Problem_1000Doors",
+    "Monty_Hall_Problem_FrenchCards",
+    "Squash_Serve",
+    "LadyBug",
+    "Monty_Hall_Batch",
+    "Squash_Batch",
+    "Squash_Exact",
+    "LadyBug_Jump",
+    "LadyBug_Exact",
+    "Parallel_Runner",
+    "Streaming_Stats",
+    "Result_Cache",
+    "Graph_Walk",
+    "Variance_Reduction",
+    "Monty_Hall_Exact",
+    "Outcome_Log",
+    "Plotting",
+    "Instrumentation",
+    "simulate",
+]
+DEFAULT_BUDGET_MS = 300
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "matplotlib": "matplotlib" in sys.modules}}))
+"""
+
+def measure_import(module: str, repeats: int = 3) -> dict:
+    # Cold-start import time of `module` in a fresh interpreter (best of `repeats` tries)
+    best = None
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)], capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the cold-start import time of the simulation modules.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        result = measure_import(module, args.repeats)
+        milliseconds = result["seconds"] * 1000
+        problems = []
+        if milliseconds > args.budget_ms:
+            problems.append(f"over budget of {args.budget_ms:.0f} ms")
+        if result["matplotlib"]:
+            problems.append("loads matplotlib")
+        failed |= bool(problems)
+        print(f"{module:32s} {milliseconds:8.1f} ms  {'FAIL: ' + ', '.join(problems) if problems else 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
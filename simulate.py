@@ -0,0 +1,266 @@
+"""
+simulate in a Nutshell
+
+One command for every game, engine and parameter, instead of editing num_simulations, N_DOORS or 0.55 in the scripts:
+
+    python simulate.py squash --param p_serve=0.6 --rounds 1e7
+    python simulate.py squash --sweep p_serve=0.5:0.7:0.005 --sweep target=9,11,15,21 --seed 2024 --output sweep.jsonl
+    python simulate.py monty_hall --sweep n_doors=3,10,100,1000 --sweep n_revealed=0,1 --engine exact
+    python simulate.py ladybug --sweep n_markings=6:16:1 --sweep p_clockwise=0.4,0.5,0.6
+    python simulate.py squash --sweep p_serve=0.5:0.7:0.01 --seed 2024 --rounds 1e7 --cache
+
+Every combination of the --sweep values (together with the fixed --param values) is one sweep point.
+The points are played on a process pool (--workers, all CPU cores by default), the most expensive ones first,
+so the pool does not end up waiting for one big point that started last. Every result is written as one JSON line
+(to stdout or --output) as soon as its point is finished, so a long sweep can be watched (and used) while it runs.
+
+Point i always plays with its own seed, drawn from the i-th child of SeedSequence(seed). With the vectorized engine
+it is split into chunks of that seed (Parallel_Runner.run_chunks, the chunks of Result_Cache), and a single point is played by all workers.
+So a sweep with a seed gives the same numbers no matter how many workers play it, in which order the points finish,
+whether a point is played alone or in a sweep, and with or without --cache. Points that cannot be played (say, a knowing host who would have
+to open more goat doors than there are) get an "error" in their record, and the sweep goes on.
+
+With --cache (and a --seed), the counts of every vectorized point are kept in Result_Cache, so running a sweep again
+costs nothing, and running it with more --rounds only plays the missing chunks.
+
+Engines: python (the pure Python games), vectorized (the NumPy batch engines), exact (the solvers, --rounds is ignored).
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from Parallel_Runner import run_chunks
+from Result_Cache import DEFAULT_CHUNK_SIZE, DEFAULT_DIRECTORY, ResultCache
+
+# Engines of every game, and the parameters each game understands
+ENGINES = {
+    "monty_hall": ("vectorized", "exact"),
+    "squash": ("python", "vectorized", "exact"),
+    "ladybug": ("python", "vectorized", "exact"),
+}
+PARAMETERS = {
+    "monty_hall": {"n_doors": 3, "n_revealed": None, "switch": True, "n_prizes": 1, "host": "knowing"},
+    "squash": {"p_serve": 0.55, "target": 11, "win_by": 2, "best_of": 1, "scoring": "par"},
+    "ladybug": {"n_markings": 12, "p_clockwise": 0.5},
+}
+
+def parse_value(text: str):
+    # 0.55 -> float, 11 -> int, true -> True, par -> "par"
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def parse_sweep(text: str) -> tuple[str, list]:
+    # name=a,b,c (a list of values) or name=start:stop:step (start, start + step, ..., stop, stop included)
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"a sweep looks like name=a,b,c or name=start:stop:step, not {text!r}")
+    if ":" in values:
+        start, stop, step = (float(value) for value in values.split(":"))
+        if step <= 0 or stop < start:
+            raise argparse.ArgumentTypeError(f"a sweep range needs a step > 0 and stop >= start, not {text!r}")
+        count = math.floor((stop - start) / step + 1e-9) + 1
+        grid = [round(start + i * step, 12) for i in range(count)]
+        if all(value == int(value) for value in (start, stop, step)):
+            grid = [int(value) for value in grid]
+        return name, grid
+    return name, [parse_value(value) for value in values.split(",")]
+
+
+def parse_param(text: str) -> tuple[str, object]:
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"a parameter looks like name=value, not {text!r}")
+    return name, parse_value(value)
+
+
+def _check_type(game: str, name: str, value) -> None:
+    # A value has to have the type of the default (ints are fine for floats, n_revealed may be None or an int)
+    default = PARAMETERS[game][name]
+    if isinstance(default, bool):
+        allowed = (bool,)
+    elif isinstance(default, float):
+        allowed = (int, float)
+    elif default is None or isinstance(default, int):
+        allowed = (int,)
+    else:
+        allowed = (type(default),)
+    if (value is None and default is None) or (isinstance(value, allowed) and (bool in allowed or not isinstance(value, bool))):
+        return
+    raise ValueError(f"{game} parameter {name!r} must be of type {' or '.join(kind.__name__ for kind in allowed)}, not {value!r}")
+
+
+def sweep_points(game: str, params: dict, sweeps: list[tuple[str, list]]) -> list[dict]:
+    # Every combination of the sweep values, on top of the defaults of the game and the fixed parameters
+    for name in list(params) + [name for name, _ in sweeps]:
+        if name not in PARAMETERS[game]:
+            raise ValueError(f"{game} has no parameter {name!r}, it knows {tuple(PARAMETERS[game])}")
+    for name, value in list(params.items()) + [(name, value) for name, values in sweeps for value in values]:
+        _check_type(game, name, value)
+    names = [name for name, _ in sweeps]
+    return [{**PARAMETERS[game], **params, **dict(zip(names, values))} for values in itertools.product(*(values for _, values in sweeps))]
+
+
+def estimated_cost(game: str, engine: str, params: dict, rounds: int) -> float:
+    # Rough relative running time of a sweep point, only used to start the most expensive points first.
+    if engine == "exact":
+        if game == "squash":
+            return params["target"] ** 2
+        return params["n_markings"] ** 2 if game == "ladybug" else 1
+    if game == "monty_hall":
+        per_round = 1.0
+    elif game == "squash":
+        per_round = params["target"] * params["best_of"] / (1 - abs(params["p_serve"] - 0.5))
+    else:
+        per_round = params["n_markings"] ** 2 if engine == "python" else params["n_markings"]
+    return rounds * per_round * (50 if engine == "python" else 1)
+
+
+def _exact(game: str, params: dict) -> dict:
+    if game == "monty_hall":
+        import Monty_Hall_Exact
+        reveals = None if params["n_revealed"] is None else (params["n_revealed"],)
+        win = Monty_Hall_Exact.win_probability(params["n_doors"], params["n_prizes"], reveals, params["switch"], params["host"])
+        return {"win_rate": float(win), "exact": str(win)}
+    if game == "squash":
+        import Squash_Exact
+        if params["best_of"] != 1 or params["scoring"] != "par":
+            raise ValueError("the exact squash solver only knows single games with par scoring")
+        return {"win_rate": float(Squash_Exact.win_probability(params["p_serve"], params["target"], params["win_by"]))}
+    import LadyBug_Exact
+    return {"distribution": LadyBug_Exact.last_marking_distribution(params["n_markings"], params["p_clockwise"]).tolist()}
+
+
+def _python(game: str, params: dict, rounds: int, seed: int) -> np.ndarray:
+    # Counts of the pure Python games: (wins, rounds) or the last marking counts
+    random.seed(seed)
+    if game == "squash":
+        from Squash_Serve import match
+        if params["best_of"] != 1 or params["scoring"] != "par":
+            raise ValueError("the pure Python squash match only knows single games with par scoring")
+        wins = sum(match(params["p_serve"], params["target"], params["win_by"]) for _ in range(rounds))
+        return np.array([wins, rounds])
+    from LadyBug import one_full_round_the_clock_fast
+    last = [one_full_round_the_clock_fast(params["p_clockwise"], params["n_markings"]) for _ in range(rounds)]
+    return np.bincount(last, minlength=params["n_markings"])
+
+
+def _job(game: str, params: dict):
+    # Count function of the vectorized engine, in the job format of Parallel_Runner
+    from functools import partial
+    if game == "monty_hall":
+        import Monty_Hall_Batch
+        if params["n_prizes"] != 1 or params["host"] != "knowing":
+            raise ValueError("the vectorized Monty Hall plays one car and the knowing host (use --engine exact for the others)")
+        return partial(Monty_Hall_Batch.count_wins, n_doors=params["n_doors"], n_revealed=params["n_revealed"], switch=params["switch"])
+    if game == "squash":
+        import Squash_Batch
+        return partial(Squash_Batch.count_wins, **params)
+    import LadyBug_Jump
+    return partial(LadyBug_Jump.last_marking_counts, **params)
+
+
+def _summary(game: str, counts: np.ndarray, rounds: int) -> dict:
+    if game == "ladybug":
+        distribution = counts / rounds
+        return {"distribution": distribution.tolist(), "standard_error": float(np.max(np.sqrt(distribution * (1 - distribution) / rounds)))}
+    win_rate = int(counts[0]) / rounds
+    return {"wins": int(counts[0]), "win_rate": win_rate, "standard_error": math.sqrt(win_rate * (1 - win_rate) / rounds)}
+
+
+def run_point(game: str, engine: str, params: dict, rounds: int, seed: int, point: int, workers: int | None = None, cache: ResultCache | None = None) -> dict:
+    # Plays one sweep point and returns its JSON record (with an "error" instead of results if the point cannot be played).
+    # A vectorized point is played as Parallel_Runner chunks of its own seed (on `workers` processes, if given),
+    # the same chunks the cache stores, so a cache only saves playing them again.
+    start = time.perf_counter()
+    record = {"point": point, "game": game, "engine": engine, "params": params}
+    try:
+        if engine == "exact":
+            record.update(_exact(game, params))
+        else:
+            record["rounds"] = rounds
+            point_seed = int(np.random.SeedSequence(seed, spawn_key=(point,)).generate_state(1)[0])
+            if engine == "python":
+                counts = _python(game, params, rounds, point_seed)
+            elif cache is not None:
+                counts = cache.run(game, _job(game, params), params, engine, point_seed, rounds, workers or 1, DEFAULT_CHUNK_SIZE)
+            else:
+                counts = run_chunks(_job(game, params), rounds, point_seed, workers or 1, DEFAULT_CHUNK_SIZE).sum(axis=0)
+            record.update(_summary(game, counts, rounds))
+    except (ValueError, TypeError) as error:
+        record["error"] = str(error)
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def run_sweep(game: str, engine: str, points: list[dict], rounds: int, seed: int, workers: int, output=sys.stdout, cache: ResultCache | None = None):
+    # Plays every point (largest first) on `workers` processes and writes each record as soon as it is ready.
+    order = sorted(range(len(points)), key=lambda point: estimated_cost(game, engine, points[point], rounds), reverse=True)
+    if len(points) == 1:
+        yield _write(run_point(game, engine, points[0], rounds, seed, 0, workers if engine == "vectorized" else None, cache), output)
+        return
+    if workers == 1:
+        for point in order:
+            yield _write(run_point(game, engine, points[point], rounds, seed, point, cache=cache), output)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(points))) as pool:
+        futures = [pool.submit(run_point, game, engine, points[point], rounds, seed, point, cache=cache) for point in order]
+        for future in as_completed(futures):
+            yield _write(future.result(), output)
+
+
+def _write(record: dict, output) -> dict:
+    output.write(json.dumps(record) + "\n")
+    output.flush()
+    return record
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Play any game with any engine, for one parameter set or a whole sweep grid.")
+    parser.add_argument("game", choices=tuple(ENGINES))
+    parser.add_argument("--param", type=parse_param, action="append", default=[], metavar="NAME=VALUE", help="fixed parameter, e.g. p_serve=0.6")
+    parser.add_argument("--sweep", type=parse_sweep, action="append", default=[], metavar="NAME=VALUES", help="a,b,c or start:stop:step")
+    parser.add_argument("--engine", default="vectorized")
+    parser.add_argument("--rounds", type=float, default=1e6)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="append the JSON lines to this file (default: stdout)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_DIRECTORY, default=None, metavar="DIRECTORY",
+                        help=f"keep the counts of the vectorized points in this result cache (default {DEFAULT_DIRECTORY}), needs --seed")
+    args = parser.parse_args()
+
+    if args.engine not in ENGINES[args.game]:
+        parser.error(f"{args.game} has the engines {ENGINES[args.game]}")
+    if args.cache is not None and args.seed is None:
+        parser.error("--cache needs a --seed (a run without a seed is never asked for again)")
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    try:
+        points = sweep_points(args.game, dict(args.param), args.sweep)
+    except ValueError as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        cache = None if args.cache is None else ResultCache(args.cache)
+        finished = sum(1 for _ in run_sweep(args.game, args.engine, points, int(args.rounds), seed, args.workers, output, cache))
+    finally:
+        if args.output:
+            output.close()
+    print(f"{finished} points in {time.perf_counter() - start:.1f} s (seed {seed})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
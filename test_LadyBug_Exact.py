@@ -0,0 +1,62 @@
+"""
+LadyBug_Exact as the ground truth for the ladybug simulations:
+the jump simulator, the graph walk on the clock and the pure Python bit-stream round have to agree with it
+within a few standard errors (seeded, so the tests are reproducible).
+
+    python -m pytest test_LadyBug_Exact.py
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+import Graph_Walk
+import LadyBug
+import LadyBug_Exact
+import LadyBug_Jump
+
+TOLERANCE = 5  # Standard errors
+
+def assert_close_to_exact(counts: np.ndarray, n_markings: int, p_clockwise: float) -> None:
+    rounds = counts.sum()
+    exact = LadyBug_Exact.last_marking_distribution(n_markings, p_clockwise)
+    standard_error = np.sqrt(np.maximum(exact * (1 - exact), 1 / rounds) / rounds)
+    assert np.all(np.abs(counts / rounds - exact) <= TOLERANCE * standard_error), (counts / rounds, exact)
+
+
+def test_fair_clock_closed_form():
+    # Every marking other than the start is last with probability 1 / (n - 1), the cover time is n (n - 1) / 2
+    for n_markings in (3, 12, 40):
+        distribution = LadyBug_Exact.last_marking_distribution(n_markings)
+        assert distribution[0] == 0
+        assert np.allclose(distribution[1:], 1 / (n_markings - 1))
+        assert LadyBug_Exact.expected_cover_time(n_markings) == pytest.approx(n_markings * (n_markings - 1) / 2)
+
+
+@pytest.mark.parametrize("n_markings, p_clockwise", [(12, 0.5), (9, 0.6), (20, 0.45)])
+def test_jump_simulator(n_markings, p_clockwise):
+    counts = LadyBug_Jump.last_marking_counts(200_000, n_markings, p_clockwise, np.random.default_rng(1))
+    assert_close_to_exact(counts, n_markings, p_clockwise)
+
+
+def test_jump_simulator_cover_time():
+    rng = np.random.default_rng(2)
+    _, steps = LadyBug_Jump.jump_round_the_clock(50_000, 12, 0.55, rng, count_steps=True)
+    expected = LadyBug_Exact.expected_cover_time(12, 0.55)
+    assert abs(steps.mean() - expected) <= TOLERANCE * steps.std() / np.sqrt(steps.size)
+
+
+def test_graph_walk_clock():
+    result = Graph_Walk.cover_walk(Graph_Walk.clock(12), 20_000, rng=np.random.default_rng(3))
+    assert_close_to_exact(result.last_visited, 12, 0.5)
+    expected = LadyBug_Exact.expected_cover_time(12)
+    cover_times = np.repeat(np.arange(result.cover_times.size), result.cover_times)
+    assert abs(cover_times.mean() - expected) <= TOLERANCE * cover_times.std() / np.sqrt(cover_times.size)
+
+
+@pytest.mark.parametrize("n_markings, p_clockwise", [(12, 0.5), (12, 0.55), (7, 0.3)])
+def test_bit_stream_round(n_markings, p_clockwise):
+    random.seed(4)
+    last = [LadyBug.one_full_round_the_clock_fast(p_clockwise, n_markings) for _ in range(20_000)]
+    assert_close_to_exact(np.bincount(last, minlength=n_markings), n_markings, p_clockwise)
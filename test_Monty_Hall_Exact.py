@@ -0,0 +1,81 @@
+"""
+Monty_Hall_Exact as the ground truth for the Monty Hall simulations:
+the vectorized engine and a small brute-force game (for the hosts the engine does not play) have to agree with it
+within a few standard errors (seeded, so the tests are reproducible).
+
+    python -m pytest test_Monty_Hall_Exact.py
+"""
+
+import math
+import random
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import Monty_Hall_Batch
+import Monty_Hall_Exact
+
+TOLERANCE = 5  # Standard errors
+
+def assert_close_to_exact(wins: int, games: int, exact: Fraction) -> None:
+    p = float(exact)
+    standard_error = math.sqrt(max(p * (1 - p), 1 / games) / games)
+    assert abs(wins / games - p) <= TOLERANCE * standard_error, (wins / games, p)
+
+
+def brute_force(n_doors: int, n_prizes: int, reveals: tuple, policy: tuple, host: str, games: int, rng: random.Random) -> tuple[int, int]:
+    # (wins, games not spoiled) of games played door by door
+    wins = not_spoiled = 0
+    for _ in range(games):
+        prizes = set(rng.sample(range(n_doors), n_prizes))
+        held = rng.randrange(n_doors)
+        closed = set(range(n_doors)) - {held}
+        spoiled = False
+        for opened, switch in zip(reveals, policy):
+            candidates = sorted(closed if host == "ignorant" else closed - prizes)
+            revealed = set(rng.sample(candidates, opened))
+            if revealed & prizes:
+                spoiled = True
+                break
+            closed -= revealed
+            if switch:
+                new = rng.choice(sorted(closed))
+                closed = (closed - {new}) | {held}
+                held = new
+        if not spoiled:
+            not_spoiled += 1
+            wins += held in prizes
+    return wins, not_spoiled
+
+
+def test_closed_forms():
+    for n_doors in (3, 52, 1000):
+        assert Monty_Hall_Exact.switch_and_stick(n_doors) == (Fraction(n_doors - 1, n_doors), Fraction(1, n_doors))
+    assert Monty_Hall_Exact.switch_and_stick(3, host="ignorant") == (Fraction(1, 2), Fraction(1, 2))
+    assert Monty_Hall_Exact.spoil_probability(3) == Fraction(1, 3)
+    assert Monty_Hall_Exact.biased_host([1, 1], 0) == (Fraction(2, 3), Fraction(1, 3))
+    assert Monty_Hall_Exact.biased_host([1, 0], 0) == (Fraction(1, 2), Fraction(1, 2))
+
+
+@pytest.mark.parametrize("n_doors, n_revealed", [(3, None), (52, None), (10, 3), (1000, 500), (5, 0)])
+def test_vectorized_engine(n_doors, n_revealed):
+    rng = np.random.default_rng(1)
+    games = 1_000_000
+    switch_wins, stick_wins = Monty_Hall_Batch.play_both(games, n_doors, n_revealed, rng)
+    reveals = None if n_revealed is None else (n_revealed,)
+    assert_close_to_exact(int(switch_wins.sum()), games, Monty_Hall_Exact.win_probability(n_doors, reveals=reveals))
+    assert_close_to_exact(int(stick_wins.sum()), games, Monty_Hall_Exact.win_probability(n_doors, reveals=reveals, policy=False))
+
+
+@pytest.mark.parametrize("n_doors, n_prizes, reveals, policy, host", [
+    (5, 2, (1, 1), (True, True), "ignorant"),
+    (6, 1, (2, 1), (True, False), "knowing"),
+    (6, 2, (1, 2), (False, True), "ignorant"),
+    (4, 1, (1,), (True,), "ignorant"),
+])
+def test_brute_force(n_doors, n_prizes, reveals, policy, host):
+    games = 40_000
+    wins, not_spoiled = brute_force(n_doors, n_prizes, reveals, policy, host, games, random.Random(2))
+    assert_close_to_exact(wins, not_spoiled, Monty_Hall_Exact.win_probability(n_doors, n_prizes, reveals, policy, host))
+    assert_close_to_exact(games - not_spoiled, games, Monty_Hall_Exact.spoil_probability(n_doors, n_prizes, reveals, policy, host))